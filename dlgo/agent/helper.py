@@ -1,35 +1,24 @@
-from dlgo.types import Point
+from dlgo.geometry import get_geometry
 
 
 def is_point_an_eye(board, point, color):
     if board.get_color_on_point(point) is not None:
         return False
 
-    for neighbor in point.neighbors():
-        if board.is_point_on_grid(neighbor):
-            neighbor_color = board.get_color_on_point(neighbor)
-            if neighbor_color is not color:
-                return False
+    geometry = get_geometry(board.num_rows, board.num_cols)
+    for neighbor in geometry.neighbors[point]:
+        neighbor_color = board.get_color_on_point(neighbor)
+        if neighbor_color is not color:
+            return False
 
     friendly_corners = 0
-    off_board_corners = 0
+    off_board_corners = geometry.num_off_board_diagonals[point]
 
-    corners = [
-        Point(point.row - 1, point.col - 1),
-        Point(point.row - 1, point.col + 1),
-        Point(point.row + 1, point.col - 1),
-        Point(point.row + 1, point.col + 1)
-    ]
-
-    for corner in corners:
-        if board.is_point_on_grid(corner):
-            corner_color = board.get_color_on_point(corner)
-            if corner_color == color:
-                friendly_corners += 1
-        else:
-            off_board_corners += 1
+    for corner in geometry.diagonals[point]:
+        corner_color = board.get_color_on_point(corner)
+        if corner_color == color:
+            friendly_corners += 1
 
     if off_board_corners > 0:
         return off_board_corners + friendly_corners == 4
     return friendly_corners >= 3
-
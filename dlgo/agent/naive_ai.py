@@ -7,7 +7,6 @@ import random
 from dlgo.agent.base import Agent
 from dlgo.agent.helper import is_point_an_eye
 from dlgo.board_slow import Move
-from dlgo.types import Point
 
 
 class RandomBot(Agent):
@@ -19,12 +18,9 @@ class RandomBot(Agent):
         """
         move_candidates = []
 
-        for r in range(1, game_state.board.num_rows + 1):
-            for c in range(1, game_state.board.num_cols + 1):
-                candidate = Point(row=r, col=c)
-
-                if game_state.is_valid_move(Move.play(candidate)) and not is_point_an_eye(game_state.board, candidate, game_state.next_player):
-                    move_candidates.append(candidate)
+        for candidate in game_state.board.empty_points():
+            if game_state.is_valid_move(Move.play(candidate)) and not is_point_an_eye(game_state.board, candidate, game_state.next_player):
+                move_candidates.append(candidate)
         if not move_candidates:
             return Move.pass_turn()
         return Move.play(random.choice(move_candidates))
@@ -1,4 +1,7 @@
+import numpy as np
+
 from dlgo.gostring import GoString
+from dlgo.geometry import get_geometry
 from dlgo import zobrist_hash
 
 
@@ -6,8 +9,12 @@ class Board:
     def __init__(self, num_rows, num_cols):
         self.num_rows = num_rows
         self.num_cols = num_cols
+        self._geometry = get_geometry(num_rows, num_cols)
         self._grid = {}
         self._hash = zobrist_hash.EMPTY_BOARD
+        self._ko = None
+        self._empty_points = set(self._geometry.points)
+        self._stone_array = np.zeros((num_rows, num_cols), dtype=np.int8)
 
     def place_stone(self, player, point):
         self._check_point_validity(point)
@@ -17,9 +24,7 @@ class Board:
             'liberties': []
         }
 
-        for neighbor in point.neighbors():
-            if not self.is_point_on_grid(neighbor):
-                continue
+        for neighbor in self._geometry.neighbors[point]:
             self._update_point_info(player, neighbor, point_info)
 
         new_string = GoString(player, [point], point_info['liberties'])
@@ -27,13 +32,74 @@ class Board:
         self._merge_with_adjacent_same_string(new_string, point_info)
 
         self._hash ^= zobrist_hash.HASH_CODE[point, player]
+        self._empty_points.discard(point)
+        self._stone_array[point.row - 1, point.col - 1] = player.value
 
+        captured_strings = []
         for other_color_string in point_info['adjacent_opposite_color']:
             replacement = other_color_string.without_liberty(point)
             if replacement.num_liberties:
                 self._replace_string(other_color_string.without_liberty(point))
             else:
                 self._remove_string(other_color_string)
+                captured_strings.append(other_color_string)
+
+        self._update_ko(player, point, captured_strings)
+
+    def _update_ko(self, player, point, captured_strings):
+        self._ko = None
+        if len(captured_strings) != 1 or len(captured_strings[0].stones) != 1:
+            return
+        new_string = self._grid[point]
+        if len(new_string.stones) == 1 and new_string.num_liberties == 1:
+            self._ko = (player.other, next(iter(captured_strings[0].stones)))
+
+    def is_simple_ko(self, player, point):
+        """
+        :return: True if point retakes the single stone ko that was just captured
+        """
+        return self._ko == (player, point)
+
+    def simple_ko(self):
+        """
+        :return: (player, point) if player may not retake the single stone ko at point
+            on this move, otherwise None
+        """
+        return self._ko
+
+    def is_self_capture(self, player, point):
+        """
+        decide suicide from neighbor liberties without placing the stone:
+        an empty neighbor, a friendly string with another liberty or an enemy
+        string in atari all leave the new stone alive
+        """
+        for neighbor in self._geometry.neighbors[point]:
+            neighbor_string = self._grid.get(neighbor)
+            if neighbor_string is None:
+                return False
+            if neighbor_string.color == player:
+                if neighbor_string.num_liberties > 1:
+                    return False
+            elif neighbor_string.num_liberties == 1:
+                return False
+        return True
+
+    def hash_after(self, player, point):
+        """
+        :return: zobrist hash of the board after player plays point, without playing it
+        """
+        next_hash = self._hash ^ zobrist_hash.HASH_CODE[point, player]
+        captured_strings = []
+        for neighbor in self._geometry.neighbors[point]:
+            neighbor_string = self._grid.get(neighbor)
+            if neighbor_string is None or neighbor_string.color == player:
+                continue
+            if neighbor_string.num_liberties == 1 and neighbor_string not in captured_strings:
+                captured_strings.append(neighbor_string)
+        for captured_string in captured_strings:
+            for stone in captured_string.stones:
+                next_hash ^= zobrist_hash.HASH_CODE[stone, captured_string.color]
+        return next_hash
 
     def _replace_string(self, new_string):
         for point in new_string.stones:
@@ -41,16 +107,47 @@ class Board:
 
     def _remove_string(self, string):
         for point in string.stones:
-            for neighbor in point.neighbors():
+            for neighbor in self._geometry.neighbors[point]:
                 neighbor_string = self._grid.get(neighbor)
                 if neighbor_string is None:
                     continue
                 if neighbor_string is not string:
                     self._replace_string(neighbor_string.with_liberty(point))
             self._grid[point] = None
+            self._empty_points.add(point)
+            self._stone_array[point.row - 1, point.col - 1] = 0
 
             self._hash ^= zobrist_hash.HASH_CODE[point, string.color]
 
+    def empty_points(self):
+        """
+        :return: list of empty points, kept up to date as stones are placed and captured
+        """
+        return list(self._empty_points)
+
+    def num_empty_points(self):
+        return len(self._empty_points)
+
+    def stone_array(self):
+        """
+        :return: read-only (num_rows, num_cols) int8 view of the stones, 0 or the
+            Player value, row-major from Point(1, 1); it follows later moves
+        """
+        array = self._stone_array.view()
+        array.flags.writeable = False
+        return array
+
+    def liberty_counts(self):
+        """
+        :return: (num_rows, num_cols) int16 array of the number of liberties of the
+            string on each point, 0 on empty points
+        """
+        counts = np.zeros((self.num_rows, self.num_cols), dtype=np.int16)
+        for point, string in self._grid.items():
+            if string is not None:
+                counts[point.row - 1, point.col - 1] = string.num_liberties
+        return counts
+
     def zobrist_hash(self):
         return self._hash
 
@@ -0,0 +1,480 @@
+import numpy as np
+
+from dlgo.gostring import GoString
+from dlgo.types import Player
+from dlgo.geometry import get_geometry
+from dlgo import zobrist_hash
+
+EMPTY = 0
+BLACK = Player.black.value
+WHITE = Player.white.value
+BORDER = 3
+
+_PLAYER = (None, Player.black, Player.white, None)
+
+_layouts = {}
+
+
+class _Layout:
+    """
+    per board size tables shared by every Board of that size, on top of the padded
+    tables of dlgo.geometry: off-board points hold BORDER, so no neighbor lookup
+    ever leaves the array
+    """
+    def __init__(self, num_rows, num_cols):
+        geometry = get_geometry(num_rows, num_cols)
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.width = geometry.padded_width
+        self.size = geometry.padded_size
+        self.points = geometry.padded_points
+        self.index = geometry.padded_index
+        self.indices = geometry.padded_indices
+        self.neighbors = geometry.padded_neighbors
+        self.diagonals = geometry.padded_diagonals
+        self.initial_stones = [BORDER] * self.size
+        self.hash_codes = (None, [0] * self.size, [0] * self.size)
+        for point, idx in self.index.items():
+            self.initial_stones[idx] = EMPTY
+            self.hash_codes[BLACK][idx] = zobrist_hash.HASH_CODE[point, Player.black]
+            self.hash_codes[WHITE][idx] = zobrist_hash.HASH_CODE[point, Player.white]
+
+    def __reduce__(self):
+        return _get_layout, (self.num_rows, self.num_cols)
+
+
+def _get_layout(num_rows, num_cols):
+    layout = _layouts.get((num_rows, num_cols))
+    if layout is None:
+        layout = _Layout(num_rows, num_cols)
+        _layouts[num_rows, num_cols] = layout
+    return layout
+
+
+class Board:
+    """
+    array backed board with the same public interface as dlgo.board.Board
+
+    strings are kept as a union-find forest that is flattened on every union
+    (the smaller string is relabelled), so string_id[p] is always the root.
+    each root carries the stone count and pseudo-liberty counters: the number of
+    stone/empty adjacencies plus the sum and sum of squares of those empty indices.
+    a string has no liberties when the count is zero, and is in atari when
+    libs * sum_sq == sum * sum (every pseudo-liberty is the same point)
+
+    play() and undo() give a mutable make/unmake interface: play() pushes the
+    captured stones and the previous hash on a move stack, undo() pops them
+    """
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self._layout = _get_layout(num_rows, num_cols)
+        size = self._layout.size
+        self._stones = list(self._layout.initial_stones)
+        self._stone_array = np.array(self._layout.initial_stones, dtype=np.int8)
+        self._string_id = [0] * size
+        self._next_stone = [0] * size
+        self._string_size = [0] * size
+        self._libs = [0] * size
+        self._lib_sum = [0] * size
+        self._lib_sum_sq = [0] * size
+        self._hash = zobrist_hash.EMPTY_BOARD
+        self._ko_color = EMPTY
+        self._ko_point = 0
+        self._empty = list(self._layout.indices)
+        self._empty_pos = [0] * size
+        for pos, idx in enumerate(self._empty):
+            self._empty_pos[idx] = pos
+        self._moves = []
+
+    def place_stone(self, player, point):
+        self._check_point_validity(point)
+        self._place(player.value, self._layout.index[point])
+
+    def play(self, player, point):
+        """
+        place a stone so that it can be taken back with undo()
+        :param player: color of the stone
+        :param point: empty point on the grid
+        """
+        self._check_point_validity(point)
+        undo_info = (self._hash, self._ko_color, self._ko_point)
+        idx = self._layout.index[point]
+        captured = self._place(player.value, idx)
+        self._moves.append((idx, captured, undo_info))
+
+    def undo(self):
+        """
+        take back the last play(), restoring captured stones, strings and hash
+        """
+        p, captured, undo_info = self._moves.pop()
+        stones = self._stones
+        neighbors = self._layout.neighbors
+        color = stones[p]
+        other = BLACK + WHITE - color
+
+        stone_array = self._stone_array
+        stones[p] = stone_array[p] = EMPTY
+        self._add_empty(p)
+        for stone in captured:
+            stones[stone] = stone_array[stone] = other
+            self._remove_empty(stone)
+
+        # every string whose stones or liberties changed touches p or a captured stone
+        seeds = [
+            n for n in neighbors[p]
+            if stones[n] == BLACK or stones[n] == WHITE
+        ]
+        for stone in captured:
+            for n in neighbors[stone]:
+                if stones[n] == color:
+                    seeds.append(n)
+
+        rebuilt = set()
+        for seed in seeds:
+            if seed not in rebuilt:
+                self._rebuild_string(seed, rebuilt)
+        self._hash, self._ko_color, self._ko_point = undo_info
+
+    def _place(self, color, p):
+        stones = self._stones
+        string_id = self._string_id
+        libs = self._libs
+        lib_sum = self._lib_sum
+        lib_sum_sq = self._lib_sum_sq
+        neighbors = self._layout.neighbors[p]
+
+        stones[p] = self._stone_array[p] = color
+        self._remove_empty(p)
+        string_id[p] = p
+        self._next_stone[p] = p
+        self._string_size[p] = 1
+        libs[p] = lib_sum[p] = lib_sum_sq[p] = 0
+        for n in neighbors:
+            neighbor_color = stones[n]
+            if neighbor_color == EMPTY:
+                libs[p] += 1
+                lib_sum[p] += n
+                lib_sum_sq[p] += n * n
+            elif neighbor_color != BORDER:
+                root = string_id[n]
+                libs[root] -= 1
+                lib_sum[root] -= p
+                lib_sum_sq[root] -= p * p
+
+        root = p
+        for n in neighbors:
+            if stones[n] == color and string_id[n] != root:
+                root = self._merge(root, string_id[n])
+
+        self._hash ^= self._layout.hash_codes[color][p]
+
+        other = BLACK + WHITE - color
+        captured = []
+        for n in neighbors:
+            if stones[n] == other and libs[string_id[n]] == 0:
+                self._remove_string(string_id[n], captured)
+
+        if len(captured) == 1 and self._string_size[root] == 1 and libs[root] == 1:
+            self._ko_color = other
+            self._ko_point = captured[0]
+        else:
+            self._ko_color = EMPTY
+            self._ko_point = 0
+        return captured
+
+    def _in_atari(self, root):
+        libs = self._libs[root]
+        lib_sum = self._lib_sum[root]
+        return libs * self._lib_sum_sq[root] == lib_sum * lib_sum
+
+    def is_simple_ko(self, player, point):
+        """
+        :return: True if point retakes the single stone ko that was just captured
+        """
+        return self._ko_color == player.value and self._ko_point == self._layout.index[point]
+
+    def simple_ko(self):
+        """
+        :return: (player, point) if player may not retake the single stone ko at point
+            on this move, otherwise None
+        """
+        if self._ko_color == EMPTY:
+            return None
+        return _PLAYER[self._ko_color], self._layout.points[self._ko_point]
+
+    def is_self_capture(self, player, point):
+        """
+        decide suicide from neighbor liberties without placing the stone:
+        an empty neighbor, a friendly string with another liberty or an enemy
+        string in atari all leave the new stone alive
+        """
+        return self._is_self_capture(player.value, self._layout.index[point])
+
+    def _is_self_capture(self, color, p):
+        stones = self._stones
+        string_id = self._string_id
+        for n in self._layout.neighbors[p]:
+            neighbor_color = stones[n]
+            if neighbor_color == EMPTY:
+                return False
+            if neighbor_color == BORDER:
+                continue
+            if (neighbor_color == color) != self._in_atari(string_id[n]):
+                return False
+        return True
+
+    def hash_after(self, player, point):
+        """
+        :return: zobrist hash of the board after player plays point, without playing it
+        """
+        stones = self._stones
+        string_id = self._string_id
+        color = player.value
+        other = BLACK + WHITE - color
+        p = self._layout.index[point]
+        next_hash = self._hash ^ self._layout.hash_codes[color][p]
+        captured_roots = []
+        for n in self._layout.neighbors[p]:
+            if stones[n] != other:
+                continue
+            root = string_id[n]
+            if root not in captured_roots and self._in_atari(root):
+                captured_roots.append(root)
+        hash_codes = self._layout.hash_codes[other]
+        for root in captured_roots:
+            for stone in self._string_stones(root):
+                next_hash ^= hash_codes[stone]
+        return next_hash
+
+    def _add_empty(self, p):
+        self._empty_pos[p] = len(self._empty)
+        self._empty.append(p)
+
+    def _remove_empty(self, p):
+        last = self._empty.pop()
+        if last != p:
+            pos = self._empty_pos[p]
+            self._empty[pos] = last
+            self._empty_pos[last] = pos
+
+    def empty_points(self):
+        """
+        :return: list of empty points, kept up to date as stones are placed and captured
+        """
+        points = self._layout.points
+        return [points[idx] for idx in self._empty]
+
+    def num_empty_points(self):
+        return len(self._empty)
+
+    def _merge(self, root, other_root):
+        string_id = self._string_id
+        next_stone = self._next_stone
+        if self._string_size[root] < self._string_size[other_root]:
+            root, other_root = other_root, root
+
+        stone = other_root
+        while True:
+            string_id[stone] = root
+            stone = next_stone[stone]
+            if stone == other_root:
+                break
+        next_stone[root], next_stone[other_root] = next_stone[other_root], next_stone[root]
+
+        self._string_size[root] += self._string_size[other_root]
+        self._libs[root] += self._libs[other_root]
+        self._lib_sum[root] += self._lib_sum[other_root]
+        self._lib_sum_sq[root] += self._lib_sum_sq[other_root]
+        return root
+
+    def _remove_string(self, root, captured):
+        stones = self._stones
+        string_id = self._string_id
+        next_stone = self._next_stone
+        libs = self._libs
+        lib_sum = self._lib_sum
+        lib_sum_sq = self._lib_sum_sq
+        neighbors = self._layout.neighbors
+        stone_array = self._stone_array
+        hash_codes = self._layout.hash_codes[stones[root]]
+
+        stone = root
+        while True:
+            stones[stone] = stone_array[stone] = EMPTY
+            self._add_empty(stone)
+            captured.append(stone)
+            self._hash ^= hash_codes[stone]
+            for n in neighbors[stone]:
+                neighbor_color = stones[n]
+                if neighbor_color == EMPTY or neighbor_color == BORDER:
+                    continue
+                neighbor_root = string_id[n]
+                if neighbor_root != root:
+                    libs[neighbor_root] += 1
+                    lib_sum[neighbor_root] += stone
+                    lib_sum_sq[neighbor_root] += stone * stone
+            stone = next_stone[stone]
+            if stone == root:
+                break
+
+    def _rebuild_string(self, start, rebuilt):
+        stones = self._stones
+        string_id = self._string_id
+        next_stone = self._next_stone
+        neighbors = self._layout.neighbors
+        color = stones[start]
+
+        members = []
+        pending = [start]
+        rebuilt.add(start)
+        while pending:
+            stone = pending.pop()
+            members.append(stone)
+            for n in neighbors[stone]:
+                if stones[n] == color and n not in rebuilt:
+                    rebuilt.add(n)
+                    pending.append(n)
+
+        libs = lib_sum = lib_sum_sq = 0
+        previous = members[-1]
+        for stone in members:
+            string_id[stone] = start
+            next_stone[previous] = stone
+            previous = stone
+            for n in neighbors[stone]:
+                if stones[n] == EMPTY:
+                    libs += 1
+                    lib_sum += n
+                    lib_sum_sq += n * n
+        self._string_size[start] = len(members)
+        self._libs[start] = libs
+        self._lib_sum[start] = lib_sum
+        self._lib_sum_sq[start] = lib_sum_sq
+
+    def _string_liberties(self, root):
+        stones = self._stones
+        neighbors = self._layout.neighbors
+        liberties = set()
+        stone = root
+        while True:
+            for n in neighbors[stone]:
+                if stones[n] == EMPTY:
+                    liberties.add(n)
+            stone = self._next_stone[stone]
+            if stone == root:
+                break
+        return liberties
+
+    def _string_stones(self, root):
+        stone_list = [root]
+        stone = self._next_stone[root]
+        while stone != root:
+            stone_list.append(stone)
+            stone = self._next_stone[stone]
+        return stone_list
+
+    def stone_array(self):
+        """
+        :return: read-only (num_rows, num_cols) int8 view of the stones, EMPTY or the
+            Player value, row-major from Point(1, 1); it follows later moves
+        """
+        width = self._layout.width
+        array = self._stone_array.reshape(-1, width)[1:-1, 1:width - 1]
+        array.flags.writeable = False
+        return array
+
+    def liberty_counts(self):
+        """
+        :return: (num_rows, num_cols) int16 array of the number of liberties of the
+            string on each point, 0 on empty points; every string is counted once
+        """
+        stones = self._stones
+        string_id = self._string_id
+        counts = [0] * self._layout.size
+        for idx in self._layout.indices:
+            color = stones[idx]
+            if (color == BLACK or color == WHITE) and string_id[idx] == idx:
+                num_liberties = len(self._string_liberties(idx))
+                for stone in self._string_stones(idx):
+                    counts[stone] = num_liberties
+        width = self._layout.width
+        return np.array(counts, dtype=np.int16).reshape(-1, width)[1:-1, 1:width - 1]
+
+    def zobrist_hash(self):
+        return self._hash
+
+    def is_point_on_grid(self, point):
+        return 1 <= point.row <= self.num_rows and \
+            1 <= point.col <= self.num_cols
+
+    def get_color_on_point(self, point):
+        idx = self._layout.index.get(point)
+        if idx is None:
+            return None
+        return _PLAYER[self._stones[idx]]
+
+    def get_go_string_on_point(self, point):
+        idx = self._layout.index.get(point)
+        if idx is None:
+            return None
+        color = self._stones[idx]
+        if color == EMPTY:
+            return None
+        points = self._layout.points
+        root = self._string_id[idx]
+        return GoString(
+            _PLAYER[color],
+            [points[stone] for stone in self._string_stones(root)],
+            [points[liberty] for liberty in self._string_liberties(root)]
+        )
+
+    def _check_point_validity(self, point):
+        assert self.is_point_on_grid(point)
+        assert self._stones[self._layout.index[point]] == EMPTY
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        :param board: board of any implementation
+        :return: new cls with the same stones, hash and ko point
+        """
+        if isinstance(board, Board):
+            return board._copy(cls)
+        new_board = cls(board.num_rows, board.num_cols)
+        for point, idx in new_board._layout.index.items():
+            color = board.get_color_on_point(point)
+            if color is not None:
+                new_board._place(color.value, idx)
+        new_board._ko_color = EMPTY
+        new_board._ko_point = 0
+        for point in board.empty_points():
+            for player in (Player.black, Player.white):
+                if board.is_simple_ko(player, point):
+                    new_board._ko_color = player.value
+                    new_board._ko_point = new_board._layout.index[point]
+        return new_board
+
+    def __deepcopy__(self, memo):
+        return self._copy(self.__class__)
+
+    def _copy(self, cls):
+        board = cls.__new__(cls)
+        board.num_rows = self.num_rows
+        board.num_cols = self.num_cols
+        board._layout = self._layout
+        board._stones = self._stones[:]
+        board._stone_array = self._stone_array.copy()
+        board._string_id = self._string_id[:]
+        board._next_stone = self._next_stone[:]
+        board._string_size = self._string_size[:]
+        board._libs = self._libs[:]
+        board._lib_sum = self._lib_sum[:]
+        board._lib_sum_sq = self._lib_sum_sq[:]
+        board._hash = self._hash
+        board._ko_color = self._ko_color
+        board._ko_point = self._ko_point
+        board._empty = self._empty[:]
+        board._empty_pos = self._empty_pos[:]
+        board._moves = []
+        return board
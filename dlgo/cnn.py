@@ -6,14 +6,20 @@ from keras.layers import Flatten
 from keras.layers import Dropout
 from keras.layers import MaxPooling2D
 
+from dlgo.encoder.labels import one_hot_batches, to_index_labels
+
 
 np.random.seed(42)
 X = np.load('../generated_games/features-40k.npy')
-Y = np.load('../generated_games/labels-40k.npy')
+Y = to_index_labels(np.load('../generated_games/labels-40k.npy'))
 
-num_samples = X.shape[0]
 size = 9
 input_shape = (size, size, 1)
+batch_size = 64
+
+# the model has no pass output
+X, Y = X[Y < size * size], Y[Y < size * size]
+num_samples = X.shape[0]
 
 X = X.reshape(num_samples, size, size, 1)
 
@@ -64,15 +70,21 @@ model.compile(
     optimizer='sgd',
     metrics=['accuracy']
 )
+train_steps = int(np.ceil(len(Y_train) / float(batch_size)))
+test_steps = int(np.ceil(len(Y_test) / float(batch_size)))
 model.fit(
-    X_train,
-    Y_train,
-    batch_size=64,
+    one_hot_batches(X_train, Y_train, size * size, batch_size),
+    steps_per_epoch=train_steps,
     epochs=15,
     verbose=1,
-    validation_data=(X_test, Y_test)
+    validation_data=one_hot_batches(X_test, Y_test, size * size, batch_size, shuffle=False),
+    validation_steps=test_steps
+)
+score = model.evaluate(
+    one_hot_batches(X_test, Y_test, size * size, batch_size, shuffle=False),
+    steps=test_steps,
+    verbose=0
 )
-score = model.evaluate(X_test, Y_test, verbose=0)
 print('Test loss: ', score[0])
 print('Test accuracy: ', score[1])
 
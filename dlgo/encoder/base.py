@@ -1,7 +1,17 @@
 import importlib
 
+import numpy as np
+
+from dlgo.board import Board
+from dlgo.gamestate import GameState
+from dlgo.move import Move
+from dlgo.types import Player, Point
+
 
 class Encoder:
+    # dtype of the arrays allocated by encode_batch
+    dtype = np.float64
+
     def name(self):
         raise NotImplementedError()
 
@@ -13,6 +23,41 @@ class Encoder:
         """
         raise NotImplementedError()
 
+    def encode_into(self, game_state, out):
+        """
+        encode game_state into out, an array of shape(); encoders that can write
+        in place override this to skip the temporary array of encode()
+        """
+        out[...] = self.encode(game_state)
+
+    def encode_batch(self, game_states, out=None):
+        """
+        :param game_states: iterable of GameState
+        :param out: optional (N, planes, rows, cols) array to fill and reuse, N must
+            be at least the number of states
+        :return: the filled part of out, a new array if out is None
+        """
+        if out is None:
+            game_states = list(game_states)
+            out = np.empty((len(game_states),) + tuple(self.shape()), dtype=self.dtype)
+        num_states = 0
+        for game_state in game_states:
+            self.encode_into(game_state, out[num_states])
+            num_states += 1
+        return out[:num_states]
+
+    def encode_game_record(self, sgf_game, out=None, board_class=Board):
+        """
+        encode the position before every move of the main line of an sgf game
+        :param sgf_game: dlgo.gosgf.Sgf_game
+        :return: (encoded positions, list of the Move played from each)
+        """
+        game_states, moves = [], []
+        for game_state, move in replay_game_record(sgf_game, board_class):
+            game_states.append(game_state)
+            moves.append(move)
+        return self.encode_batch(game_states, out), moves
+
     def encode_point(self, point):
         """
         turns integer index back into go board point
@@ -31,12 +76,62 @@ class Encoder:
         raise NotImplementedError()
 
 
-def get_encoder_by_name(name, board_size):
+def replay_game_record(sgf_game, board_class=Board):
+    """
+    play through the main line of an sgf game, starting from the setup stones of
+    its root. the first player is taken from PL, else from the first move, else
+    white after black handicap stones and black otherwise
+    :return: generator of (game_state, move), the state before each move
+    """
+    size = sgf_game.get_size()
+    board = board_class(size, size)
+    root = sgf_game.get_root()
+    black_stones, white_stones, _ = root.get_setup_stones()
+    for player, stones in ((Player.black, black_stones), (Player.white, white_stones)):
+        for row, col in stones:
+            board.place_stone(player, Point(row + 1, col + 1))
+
+    nodes = list(sgf_game.main_sequence_iter())
+    for node in nodes[1:]:
+        if node.has_setup_stones():
+            raise ValueError('setup stones after the root node are not supported')
+
+    first_colors = [node.get_move()[0] for node in nodes if node.get_move()[0] is not None]
+    if root.has_property(b'PL'):
+        first_color = root.get(b'PL')
+    elif first_colors:
+        first_color = first_colors[0]
+    else:
+        first_color = 'w' if black_stones and not white_stones else 'b'
+    next_player = Player.black if first_color == 'b' else Player.white
+    game_state = GameState(board, next_player, None, None)
+
+    for node in nodes:
+        color, move_tuple = node.get_move()
+        if color is None:
+            continue
+        if move_tuple is None:
+            move = Move.pass_turn()
+        else:
+            row, col = move_tuple
+            move = Move.play(Point(row + 1, col + 1))
+        player = Player.black if color == 'b' else Player.white
+        if player != game_state.next_player:
+            # a player moved twice in a row, as after an unrecorded pass
+            game_state = game_state.apply_move(Move.pass_turn())
+        yield game_state, move
+        game_state = game_state.apply_move(move)
+
+
+def get_encoder_by_name(name, board_size, **kwargs):
+    """
+    :param kwargs: passed on to the encoder, e.g. dtype
+    """
     if isinstance(board_size, int):
         board_size = (board_size, board_size)
     module = importlib.import_module('dlgo.encoder.' + name)
     constructor = getattr(module, 'create')
-    return constructor(board_size)
+    return constructor(board_size, **kwargs)
 
 
 
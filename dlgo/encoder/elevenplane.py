@@ -0,0 +1,82 @@
+import numpy as np
+
+from dlgo.encoder.base import Encoder
+from dlgo.geometry import get_geometry
+from dlgo.types import Player
+
+
+class ElevenPlaneEncoder(Encoder):
+    """
+    planes 0-3: black stones whose string has 1, 2, 3, 4 or more liberties
+    planes 4-7: the same for white
+    plane 8: all ones if black is to move
+    plane 9: all ones if white is to move
+    plane 10: the point the player to move may not play because of a simple ko
+    planes 11 on, only with history_length > 0: two per earlier position, black
+      and white stones one move ago, then two moves ago and so on, read from the
+      previous_state chain; all zero before the start of the game
+    """
+    def __init__(self, board_size, dtype=np.float64, history_length=0):
+        """
+        :param dtype: dtype of the encoded planes, e.g. np.int8 or np.float32
+        :param history_length: number of earlier positions, 11 + 2 * history_length planes
+        """
+        self.board_width, self.board_height = board_size
+        self.history_length = history_length
+        self.num_planes = 11 + 2 * history_length
+        self.dtype = np.dtype(dtype)
+        self._geometry = get_geometry(self.board_height, self.board_width)
+
+    def name(self):
+        if self.history_length:
+            return 'elevenplane_history'
+        return 'elevenplane'
+
+    def encode(self, game_state):
+        board_tensor = np.empty(self.shape(), dtype=self.dtype)
+        self.encode_into(game_state, board_tensor)
+        return board_tensor
+
+    def encode_into(self, game_state, out):
+        board = game_state.board
+        stones = board.stone_array()
+        liberties = np.minimum(board.liberty_counts(), 4)
+        for base_plane, player in ((0, Player.black), (4, Player.white)):
+            own_stones = stones == player.value
+            for num_liberties in range(1, 5):
+                out[base_plane + num_liberties - 1] = own_stones & (liberties == num_liberties)
+
+        next_player = game_state.next_player
+        out[8] = next_player == Player.black
+        out[9] = next_player == Player.white
+        out[10] = 0
+        ko = board.simple_ko()
+        if ko is not None and ko[0] == next_player:
+            point = ko[1]
+            out[10, point.row - 1, point.col - 1] = 1
+
+        previous_state = game_state.previous_state
+        for plane in range(11, self.num_planes, 2):
+            if previous_state is None:
+                out[plane:plane + 2] = 0
+                continue
+            previous_stones = previous_state.board.stone_array()
+            out[plane] = previous_stones == Player.black.value
+            out[plane + 1] = previous_stones == Player.white.value
+            previous_state = previous_state.previous_state
+
+    def encode_point(self, point):
+        return self._geometry.point_index[point]
+
+    def decode_point_index(self, index):
+        return self._geometry.points[index]
+
+    def num_points(self):
+        return self.board_width * self.board_height
+
+    def shape(self):
+        return self.num_planes, self.board_height, self.board_width
+
+
+def create(board_size, dtype=np.float64, history_length=0):
+    return ElevenPlaneEncoder(board_size, dtype, history_length)
@@ -0,0 +1,10 @@
+import numpy as np
+
+from dlgo.encoder.elevenplane import ElevenPlaneEncoder
+
+
+def create(board_size, dtype=np.float64, history_length=4):
+    """
+    the eleven planes followed by the stones of history_length earlier positions
+    """
+    return ElevenPlaneEncoder(board_size, dtype, history_length)
@@ -0,0 +1,58 @@
+"""
+move labels stored as int16 point indices instead of one-hot vectors
+
+index i < num_points is the point encoder.decode_point_index(i), num_points is a
+pass. one-hot vectors are only built for the batch being trained on.
+"""
+
+import numpy as np
+
+
+__all__ = [
+    'encode_move_label',
+    'to_index_labels',
+    'to_one_hot',
+    'one_hot_batches',
+]
+
+LABEL_DTYPE = np.int16
+
+
+def encode_move_label(encoder, move):
+    """
+    :return: index of move, encoder.num_points() for a pass
+    """
+    if move.is_pass:
+        return encoder.num_points()
+    return encoder.encode_point(move.point)
+
+
+def to_index_labels(labels):
+    """
+    :param labels: index labels, or one-hot vectors as written by older data files
+    :return: int16 index labels
+    """
+    labels = np.asarray(labels)
+    if labels.ndim > 1:
+        labels = labels.argmax(axis=-1)
+    return labels.astype(LABEL_DTYPE)
+
+
+def to_one_hot(labels, num_classes, dtype=np.float32):
+    one_hot = np.zeros((len(labels), num_classes), dtype=dtype)
+    one_hot[np.arange(len(labels)), labels] = 1
+    return one_hot
+
+
+def one_hot_batches(features, labels, num_classes, batch_size, shuffle=True):
+    """
+    endless (features, one-hot labels) batches for model.fit, one pass over the data
+    per len(labels) // batch_size batches, rounded up
+    :param labels: index labels, all below num_classes
+    """
+    num_samples = len(labels)
+    while True:
+        order = np.random.permutation(num_samples) if shuffle else np.arange(num_samples)
+        for start in range(0, num_samples, batch_size):
+            batch = order[start:start + batch_size]
+            yield features[batch], to_one_hot(labels[batch], num_classes)
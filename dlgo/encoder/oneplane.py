@@ -1,40 +1,45 @@
 import numpy as np
 
 from dlgo.encoder.base import Encoder
-from dlgo.types import Point
+from dlgo.geometry import get_geometry
+from dlgo.types import Player
 
 
 class OnePointEncoder(Encoder):
-    def __init__(self, board_size):
+    def __init__(self, board_size, dtype=np.float64):
+        """
+        :param dtype: dtype of the encoded planes, e.g. np.int8 or np.float32
+        """
         self.board_width, self.board_height = board_size
         self.num_planes = 1
+        self.dtype = np.dtype(dtype)
+        self._geometry = get_geometry(self.board_height, self.board_width)
+        # stone codes (empty, black, white) -> plane value, per player to move
+        self._values = {
+            Player.black: np.array([0, 1, -1], dtype=self.dtype),
+            Player.white: np.array([0, -1, 1], dtype=self.dtype),
+        }
 
     def name(self):
         return 'oneplane'
 
     def encode(self, game_state):
-        board_matrix = np.zeros(self.shape())
-        next_player = game_state.next_player
-        for r in range(self.board_height):
-            for c in range(self.board_width):
-                point = Point(row=r + 1, col=c + 1)
-                go_string = game_state.board.get_go_string_on_point(point)
-                if go_string is None:
-                    continue
-                if go_string.color == next_player:
-                    board_matrix[0, r, c] = 1
-                else:
-                    board_matrix[0, r, c] = -1
-
+        """
+        1 for stones of the player to move, -1 for the opponent's, 0 for empty points
+        """
+        board_matrix = np.empty(self.shape(), dtype=self.dtype)
+        self.encode_into(game_state, board_matrix)
         return board_matrix
 
+    def encode_into(self, game_state, out):
+        values = self._values[game_state.next_player]
+        np.take(values, game_state.board.stone_array(), out=out[0])
+
     def encode_point(self, point):
-        return self.board_width * (point.row - 1) + (point.col - 1)
+        return self._geometry.point_index[point]
 
     def decode_point_index(self, index):
-        row = index // self.board_width
-        col = index % self.board_width
-        return Point(row=row + 1, col=col + 1)
+        return self._geometry.points[index]
 
     def num_points(self):
         return self.board_width * self.board_height
@@ -43,8 +48,8 @@ class OnePointEncoder(Encoder):
         return self.num_planes, self.board_height, self.board_width
 
 
-def create(board_size):
-    return OnePointEncoder(board_size)
+def create(board_size, dtype=np.float64):
+    return OnePointEncoder(board_size, dtype)
 
 
 
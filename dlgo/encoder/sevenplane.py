@@ -0,0 +1,60 @@
+import numpy as np
+
+from dlgo.encoder.base import Encoder
+from dlgo.geometry import get_geometry
+
+
+class SevenPlaneEncoder(Encoder):
+    """
+    planes 0-2: stones of the player to move whose string has 1, 2, 3 or more liberties
+    planes 3-5: the same for the opponent
+    plane 6: the point the player to move may not play because of a simple ko
+    """
+    def __init__(self, board_size, dtype=np.float64):
+        """
+        :param dtype: dtype of the encoded planes, e.g. np.int8 or np.float32
+        """
+        self.board_width, self.board_height = board_size
+        self.num_planes = 7
+        self.dtype = np.dtype(dtype)
+        self._geometry = get_geometry(self.board_height, self.board_width)
+
+    def name(self):
+        return 'sevenplane'
+
+    def encode(self, game_state):
+        board_tensor = np.empty(self.shape(), dtype=self.dtype)
+        self.encode_into(game_state, board_tensor)
+        return board_tensor
+
+    def encode_into(self, game_state, out):
+        board = game_state.board
+        stones = board.stone_array()
+        liberties = np.minimum(board.liberty_counts(), 3)
+        next_player = game_state.next_player
+        for base_plane, player in ((0, next_player), (3, next_player.other)):
+            own_stones = stones == player.value
+            for num_liberties in range(1, 4):
+                out[base_plane + num_liberties - 1] = own_stones & (liberties == num_liberties)
+
+        out[6] = 0
+        ko = board.simple_ko()
+        if ko is not None and ko[0] == next_player:
+            point = ko[1]
+            out[6, point.row - 1, point.col - 1] = 1
+
+    def encode_point(self, point):
+        return self._geometry.point_index[point]
+
+    def decode_point_index(self, index):
+        return self._geometry.points[index]
+
+    def num_points(self):
+        return self.board_width * self.board_height
+
+    def shape(self):
+        return self.num_planes, self.board_height, self.board_width
+
+
+def create(board_size, dtype=np.float64):
+    return SevenPlaneEncoder(board_size, dtype)
@@ -0,0 +1,101 @@
+"""
+the eight symmetries of a square board: four rotations, each with and without a
+left-right mirror. features are transformed as NumPy views over their last two
+axes, move labels through the encoder's point indices.
+"""
+
+import numpy as np
+
+from dlgo.types import Point
+
+
+__all__ = [
+    'DihedralSymmetry',
+]
+
+
+class DihedralSymmetry(object):
+    num_symmetries = 8
+
+    def __init__(self, encoder):
+        """
+        :param encoder: Encoder of a square board; move index num_points() stands for
+            pass and is left alone
+        """
+        num_rows, num_cols = encoder.shape()[-2:]
+        assert num_rows == num_cols, 'rotations need a square board'
+        num_points = encoder.num_points()
+        self.num_points = num_points
+
+        grid = np.empty((num_rows, num_cols), dtype=np.int64)
+        for row in range(num_rows):
+            for col in range(num_cols):
+                grid[row, col] = encoder.encode_point(Point(row + 1, col + 1))
+
+        # index_maps[s][i]: index that move i has after symmetry s,
+        # inverse_maps[s][j]: index of the move that lands on j
+        self.index_maps = []
+        self.inverse_maps = []
+        for symmetry in range(self.num_symmetries):
+            # the move with index moved[k] lands on the point with index grid[k]
+            moved = self.transform(grid, symmetry).ravel()
+            index_map = np.empty(num_points + 1, dtype=np.int64)
+            index_map[moved] = grid.ravel()
+            index_map[num_points] = num_points
+            inverse_map = np.empty(num_points + 1, dtype=np.int64)
+            inverse_map[grid.ravel()] = moved
+            inverse_map[num_points] = num_points
+            self.index_maps.append(index_map)
+            self.inverse_maps.append(inverse_map)
+
+    @staticmethod
+    def transform(planes, symmetry):
+        """
+        :param planes: array whose last two axes are rows and cols, e.g. one encoded
+            position or a whole (N, planes, rows, cols) batch
+        :param symmetry: 0 to 7, 0 is the identity
+        :return: a view of planes, nothing is copied
+        """
+        rotated = np.rot90(planes, symmetry // 2, axes=(-2, -1))
+        if symmetry % 2:
+            return np.flip(rotated, axis=-1)
+        return rotated
+
+    def transform_labels(self, labels, symmetry):
+        """
+        :param labels: move indices of any shape, or one-hot vectors along the last axis
+        :return: labels of the moves after symmetry
+        """
+        labels = np.asarray(labels)
+        if np.issubdtype(labels.dtype, np.integer):
+            return self.index_maps[symmetry][labels]
+        return labels[..., self.inverse_maps[symmetry][:labels.shape[-1]]]
+
+    def untransform_policy(self, policy, symmetry):
+        """
+        :param policy: move probabilities along the last axis, predicted for a
+            position transformed by symmetry
+        :return: the same probabilities for the untransformed position
+        """
+        return policy[..., self.index_maps[symmetry][:policy.shape[-1]]]
+
+    def augment(self, features, labels):
+        """
+        :return: generator of (features, labels) under each of the eight symmetries,
+            features as views
+        """
+        for symmetry in range(self.num_symmetries):
+            yield self.transform(features, symmetry), self.transform_labels(labels, symmetry)
+
+    def average_policy(self, predict, planes):
+        """
+        symmetry averaged prediction for one encoded position
+        :param predict: function from a (8, planes, rows, cols) batch to
+            (8, moves) probabilities, e.g. model.predict_on_batch
+        """
+        batch = np.stack([self.transform(planes, symmetry) for symmetry in range(self.num_symmetries)])
+        policies = np.asarray(predict(batch))
+        return np.mean([
+            self.untransform_policy(policies[symmetry], symmetry)
+            for symmetry in range(self.num_symmetries)
+        ], axis=0)
@@ -1,8 +1,9 @@
 import copy
 
 from dlgo.board import Board
+from dlgo.history import PositionHistory
 from dlgo.move import Move
-from dlgo.types import Player, Point
+from dlgo.types import Player
 from dlgo.scoring import compute_game_result
 
 
@@ -12,11 +13,10 @@ class GameState:
         self.next_player = next_player
         self.previous_state = previous_state
         if self.previous_state is None:
-            self.previous_states = frozenset()
+            self.previous_states = PositionHistory()
         else:
-            self.previous_states = frozenset(
-                previous_state.previous_states |
-                {(previous_state.next_player, previous_state.board.zobrist_hash())}
+            self.previous_states = previous_state.previous_states.add(
+                (previous_state.next_player, previous_state.board.zobrist_hash())
             )
         self.last_move = last_move
 
@@ -32,11 +32,37 @@ class GameState:
 
         return GameState(next_board, self.next_player.other, self, move)
 
+    def apply_move_in_place(self, move):
+        """
+        like apply_move, but the move is played on this state's own board instead of
+        a copy, so this state sees it too until undo_move() takes it back. only for
+        boards with a play/undo stack (dlgo.board_fast.Board) that no other state shares
+        :return: new GameState on the same board
+        """
+        next_state = GameState(self.board, self.next_player.other, self, move)
+        if move.is_play:
+            self.board.play(self.next_player, move.point)
+        return next_state
+
+    def undo_move(self):
+        """
+        take back the move of a state made by apply_move_in_place
+        :return: the previous state, whose board is as it was before the move
+        """
+        if self.last_move.is_play:
+            self.board.undo()
+        return self.previous_state
+
     @classmethod
-    def new_game(cls, board_size):
+    def new_game(cls, board_size, board_class=Board):
+        """
+        :param board_size: int or (rows, cols)
+        :param board_class: dlgo.board.Board or the array backed dlgo.board_fast.Board
+        :return: empty GameState with black to play
+        """
         if isinstance(board_size, int):
             board_size = (board_size, board_size)
-        board = Board(*board_size)
+        board = board_class(*board_size)
         return GameState(board, Player.black, None, None)
 
     def _does_both_sides_passed(self):
@@ -56,9 +82,7 @@ class GameState:
     def is_move_self_capture(self, player, move):
         if not move.is_play:
             return False
-        next_board = self._get_next_board(move, player)
-        new_string = next_board.get_go_string_on_point(move.point)
-        return new_string.num_liberties == 0
+        return self.board.is_self_capture(player, move.point)
 
     def _get_next_board(self, move, player):
         next_board = copy.deepcopy(self.board)
@@ -70,11 +94,13 @@ class GameState:
         return self.next_player, self.board
 
     def does_move_violate_ko(self, player, move):
+        """
+        the board is only read, never played on, so states sharing it are safe
+        """
         if not move.is_play:
             return False
-        next_board = self._get_next_board(move, player)
-        next_state = player.other, next_board.zobrist_hash()
-        return next_state in self.previous_states
+        next_hash = self.board.hash_after(player, move.point)
+        return (player.other, next_hash) in self.previous_states
 
     @staticmethod
     def _check_state_exist_ever_before(next_state, past_state):
@@ -89,25 +115,44 @@ class GameState:
             return False
         if move.is_pass or move.is_resign:
             return True
+        return self._is_valid_play(self.next_player, move.point)
+
+    def _is_valid_play(self, player, point):
+        """
+        legality oracle that never builds the next board: suicide comes from neighbor
+        liberty counts, an immediate ko retake from the board's ko point, and positional
+        superko from the hash the move would produce (only walks stones when it captures)
+        """
+        board = self.board
         return (
-            self.board.get_color_on_point(move.point) is None and
-            not self.is_move_self_capture(self.next_player, move) and
-            not self.does_move_violate_ko(self.next_player, move)
+            board.get_color_on_point(point) is None and
+            not board.is_simple_ko(player, point) and
+            not board.is_self_capture(player, point) and
+            (player.other, board.hash_after(player, point)) not in self.previous_states
         )
 
     def get_legal_moves(self):
+        """
+        only the board's empty points are checked, each with the cheap legality oracle
+        :return: legal plays followed by pass and resign
+        """
         move_list = []
-        for row in range(1, self.board.num_rows + 1):
-            for col in range(1, self.board.num_cols + 1):
-                move = Move.play(Point(row, col))
-                if self.is_valid_move(move):
-                    move_list.append(move)
+        if not self.is_over():
+            for point in self.board.empty_points():
+                if self._is_valid_play(self.next_player, point):
+                    move_list.append(Move.play(point))
 
         move_list.append(Move.pass_turn())
         move_list.append(Move.resign())
 
         return move_list
 
+    def max_legal_moves(self):
+        """
+        :return: upper bound on len(get_legal_moves()) without computing them
+        """
+        return self.board.num_empty_points() + 2
+
     def get_winner(self):
         if not self.is_over():
             return None
@@ -0,0 +1,85 @@
+from dlgo.types import Point
+
+_geometries = {}
+
+
+class BoardGeometry:
+    """
+    neighbor, diagonal and index tables for one board size, built once and shared
+
+    point tables are keyed by on-grid Point and only contain on-grid points.
+    padded tables describe the flat layout used by dlgo.board_fast: the grid gets
+    one ring of off-board points, so padded index = row * padded_width + col
+    for the 1-based Point(row, col) and every on-grid index has four array neighbors
+    """
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.num_points = num_rows * num_cols
+
+        self.points = [
+            Point(row=row, col=col)
+            for row in range(1, num_rows + 1)
+            for col in range(1, num_cols + 1)
+        ]
+        self.point_index = {point: idx for idx, point in enumerate(self.points)}
+
+        self.neighbors = {}
+        self.diagonals = {}
+        self.num_off_board_diagonals = {}
+        for point in self.points:
+            row, col = point
+            self.neighbors[point] = self._on_grid([
+                Point(row - 1, col), Point(row + 1, col), Point(row, col - 1), Point(row, col + 1)
+            ])
+            self.diagonals[point] = self._on_grid([
+                Point(row - 1, col - 1), Point(row - 1, col + 1),
+                Point(row + 1, col - 1), Point(row + 1, col + 1)
+            ])
+            self.num_off_board_diagonals[point] = 4 - len(self.diagonals[point])
+
+        width = num_cols + 2
+        self.padded_width = width
+        self.padded_size = (num_rows + 2) * width
+        self.padded_points = [None] * self.padded_size
+        self.padded_index = {}
+        self.padded_indices = []
+        self.padded_neighbors = [()] * self.padded_size
+        self.padded_diagonals = [()] * self.padded_size
+        for point in self.points:
+            idx = point.row * width + point.col
+            self.padded_points[idx] = point
+            self.padded_index[point] = idx
+            self.padded_indices.append(idx)
+            self.padded_neighbors[idx] = (idx - width, idx - 1, idx + 1, idx + width)
+            self.padded_diagonals[idx] = (idx - width - 1, idx - width + 1, idx + width - 1, idx + width + 1)
+
+    def _on_grid(self, points):
+        return tuple(point for point in points if self.is_point_on_grid(point))
+
+    def is_point_on_grid(self, point):
+        return 1 <= point.row <= self.num_rows and \
+            1 <= point.col <= self.num_cols
+
+    def is_edge(self, point):
+        return self.num_off_board_diagonals[point] > 0
+
+    def is_corner(self, point):
+        return self.num_off_board_diagonals[point] == 3
+
+    def __reduce__(self):
+        return get_geometry, (self.num_rows, self.num_cols)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def get_geometry(num_rows, num_cols):
+    geometry = _geometries.get((num_rows, num_cols))
+    if geometry is None:
+        geometry = BoardGeometry(num_rows, num_cols)
+        _geometries[num_rows, num_cols] = geometry
+    return geometry
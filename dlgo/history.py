@@ -0,0 +1,89 @@
+from dlgo.types import Player
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_WHITE_BIT = 1 << 63
+
+
+def _key(position):
+    player, board_hash = position
+    if player == Player.white:
+        return board_hash | _WHITE_BIT
+    return board_hash
+
+
+def _popcount(bits):
+    return bin(bits).count('1')
+
+
+def _contains(node, key):
+    shift = 0
+    while True:
+        bitmap, children = node
+        bit = 1 << ((key >> shift) & _MASK)
+        if not bitmap & bit:
+            return False
+        child = children[_popcount(bitmap & (bit - 1))]
+        if isinstance(child, int):
+            return child == key
+        node = child
+        shift += _BITS
+
+
+def _insert(node, key, shift):
+    bitmap, children = node
+    bit = 1 << ((key >> shift) & _MASK)
+    pos = _popcount(bitmap & (bit - 1))
+    if not bitmap & bit:
+        return bitmap | bit, children[:pos] + (key,) + children[pos:]
+
+    child = children[pos]
+    if isinstance(child, int):
+        if child == key:
+            return node
+        new_child = _pair(child, key, shift + _BITS)
+    else:
+        new_child = _insert(child, key, shift + _BITS)
+        if new_child is child:
+            return node
+    return bitmap, children[:pos] + (new_child,) + children[pos + 1:]
+
+
+def _pair(key, other_key, shift):
+    index = (key >> shift) & _MASK
+    other_index = (other_key >> shift) & _MASK
+    if index == other_index:
+        return 1 << index, (_pair(key, other_key, shift + _BITS),)
+    if index > other_index:
+        key, other_key = other_key, key
+    return (1 << index) | (1 << other_index), (key, other_key)
+
+
+_EMPTY_NODE = (0, ())
+
+
+class PositionHistory:
+    """
+    persistent set of (player, zobrist hash) positions for the superko check
+
+    a hash array mapped trie on the zobrist bits: add() returns a new history and
+    leaves this one untouched, copying only the O(log n) nodes on the path to the
+    new key, so every GameState of a game or a search tree shares one structure
+    """
+    __slots__ = ('_root', '_size')
+
+    def __init__(self, root=_EMPTY_NODE, size=0):
+        self._root = root
+        self._size = size
+
+    def add(self, position):
+        root = _insert(self._root, _key(position), 0)
+        if root is self._root:
+            return self
+        return PositionHistory(root, self._size + 1)
+
+    def __contains__(self, position):
+        return _contains(self._root, _key(position))
+
+    def __len__(self):
+        return self._size
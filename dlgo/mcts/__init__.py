@@ -1 +1,8 @@
-from .mcts import *
\ No newline at end of file
+from .mcts import *
+from .parallel import *
+from .compact import *
+from .transposition import *
+from .rave import *
+from .puct import *
+from .threaded import *
+from .widening import *
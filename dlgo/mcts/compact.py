@@ -0,0 +1,202 @@
+"""
+MCTS on a compact tree: node statistics live in preallocated NumPy arrays
+instead of one MCTSNode object per node, and game states are never stored.
+"""
+
+import math
+import random
+
+import numpy as np
+
+from dlgo import agent
+from dlgo import board_fast
+from dlgo.gamestate import GameState
+from dlgo.geometry import get_geometry
+from dlgo.mcts import playout
+from dlgo.move import Move
+
+
+__all__ = [
+    'CompactTree',
+    'CompactMCTSAgent',
+]
+
+
+class CompactTree(object):
+    """
+    node 0 is the root. for node i:
+      parent[i]       index of the parent node, -1 for the root
+      move[i]         move into the node: row-major point index, or num_points for pass
+      visits[i]       rollouts through the node
+      wins[i]         rollouts won by the player who played move[i]
+      first_child[i]  children occupy first_child[i] .. first_child[i] + num_children[i] - 1,
+                      -1 until the node is expanded
+    a node's children are allocated together when it is expanded, so the statistics
+    of siblings are contiguous. resign is never part of the tree.
+    """
+    def __init__(self, root_state, capacity=1024):
+        board = root_state.board
+        self.geometry = get_geometry(board.num_rows, board.num_cols)
+        self.pass_index = self.geometry.num_points
+        self.root_state = root_state
+        self.size = 0
+
+        self.parent = np.empty(capacity, dtype=np.int32)
+        self.move = np.empty(capacity, dtype=np.int16)
+        self.visits = np.zeros(capacity, dtype=np.int32)
+        self.wins = np.zeros(capacity, dtype=np.float64)
+        self.first_child = np.empty(capacity, dtype=np.int32)
+        self.num_children = np.zeros(capacity, dtype=np.int32)
+
+        self._allocate(1)
+        self.parent[0] = -1
+        self.move[0] = -1
+
+    def _allocate(self, count):
+        """
+        :return: index of the first of count new nodes
+        """
+        start = self.size
+        if start + count > len(self.visits):
+            self._grow(max(2 * len(self.visits), start + count))
+        self.size += count
+        self.first_child[start:self.size] = -1
+        return start
+
+    def _grow(self, capacity):
+        for name in ('parent', 'move', 'visits', 'wins', 'first_child', 'num_children'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def is_expanded(self, node):
+        return self.first_child[node] >= 0
+
+    def expand(self, node, game_state):
+        """
+        allocate one child per legal move of game_state, the state at node
+        """
+        move_indices = [
+            self.encode_move(move)
+            for move in game_state.get_legal_moves()
+            if not move.is_resign
+        ]
+        start = self._allocate(len(move_indices))
+        end = start + len(move_indices)
+        self.parent[start:end] = node
+        self.move[start:end] = move_indices
+        self.first_child[node] = start
+        self.num_children[node] = len(move_indices)
+
+    def children(self, node):
+        start = self.first_child[node]
+        if start < 0:
+            return range(0)
+        return range(start, start + self.num_children[node])
+
+    def encode_move(self, move):
+        if move.is_pass:
+            return self.pass_index
+        return self.geometry.point_index[move.point]
+
+    def decode_move(self, move_index):
+        if move_index == self.pass_index:
+            return Move.pass_turn()
+        return Move.play(self.geometry.points[move_index])
+
+    def game_state(self, node):
+        """
+        materialize the state at node by replaying the moves from the root
+        """
+        moves = []
+        while node > 0:
+            moves.append(self.move[node])
+            node = self.parent[node]
+        state = self.root_state
+        for move_index in reversed(moves):
+            state = state.apply_move(self.decode_move(move_index))
+        return state
+
+    def winning_frac(self, node):
+        return self.wins[node] / self.visits[node]
+
+
+class CompactMCTSAgent(agent.Agent):
+    def __init__(self, num_rounds, temperature, capacity=1024):
+        agent.Agent.__init__(self)
+        self.num_rounds = num_rounds
+        self.temperature = temperature
+        self.capacity = capacity
+
+    def select_move(self, game_state):
+        tree = self.search(game_state)
+        root_children = tree.children(0)
+        if len(root_children) == 0:
+            return Move.pass_turn()
+
+        scored_moves = [
+            (tree.winning_frac(child), tree.decode_move(tree.move[child]), tree.visits[child])
+            for child in root_children
+            if tree.visits[child] > 0
+        ]
+        scored_moves.sort(key=lambda x: x[0], reverse=True)
+        for s, m, n in scored_moves[:10]:
+            print('%s - %.3f (%d)' % (m, s, n))
+        return scored_moves[0][1]
+
+    def search(self, game_state):
+        tree = CompactTree(game_state, self.capacity)
+        # the search owns this board: each round plays its moves on it on the way down
+        # and takes them back after the rollout, instead of copying the board every step
+        root_state = GameState(
+            board_fast.Board.from_board(game_state.board), game_state.next_player,
+            game_state.previous_state, game_state.last_move
+        )
+        for i in range(self.num_rounds):
+            node = 0
+            state = root_state
+            path = [0]
+            while not state.is_over():
+                if not tree.is_expanded(node):
+                    tree.expand(node, state)
+                node = self.select_child(tree, node)
+                state = state.apply_move_in_place(tree.decode_move(tree.move[node]))
+                path.append(node)
+                if tree.visits[node] == 0:
+                    break
+
+            winner = playout.simulate_random_game(state)
+            while state is not root_state:
+                state = state.undo_move()
+            self._backup(tree, path, game_state.next_player, winner)
+        return tree
+
+    @staticmethod
+    def _backup(tree, path, root_player, winner):
+        """
+        the root's children were played by root_player and colors alternate from there
+        """
+        mover_won = winner != root_player
+        for node in path:
+            tree.visits[node] += 1
+            if mover_won:
+                tree.wins[node] += 1
+            mover_won = not mover_won
+
+    def select_child(self, tree, node):
+        """
+        a random unvisited child first, otherwise the child with the best UCT score,
+        computed for the whole contiguous block of siblings at once. the parent's
+        visit count is kept up to date by _backup, so nothing is summed here
+        """
+        start = tree.first_child[node]
+        stop = start + tree.num_children[node]
+        visits = tree.visits[start:stop]
+        unvisited = np.flatnonzero(visits == 0)
+        if len(unvisited):
+            return start + int(unvisited[random.randrange(len(unvisited))])
+
+        log_rollouts = math.log(tree.visits[node])
+        uct_scores = tree.wins[start:stop] / visits + self.temperature * np.sqrt(log_rollouts / visits)
+        return start + int(np.argmax(uct_scores))
@@ -1,13 +1,20 @@
+import heapq
 import math
 import random
+import threading
+import time
+from collections import namedtuple
 
 from dlgo import agent
+from dlgo.mcts import playout
+from dlgo.mcts.transposition import TranspositionTable
 from dlgo.types import Player
 from dlgo.utils import coords_from_point
 
 
 __all__ = [
     'MCTSAgent',
+    'SearchAnalysis',
 ]
 
 
@@ -41,30 +48,127 @@ def show_tree(node, indent='', max_depth=3):
         ))
 
 
-class MCTSNode(object):
-    def __init__(self, game_state, parent=None, move=None):
-        self.game_state = game_state
-        self.parent = parent
-        self.move = move
+def _move_key(move):
+    if move.is_pass:
+        return 'pass'
+    if move.is_resign:
+        return 'resign'
+    return move.point
+
+
+class SearchAnalysis(namedtuple('SearchAnalysis', 'move ownership score_margin num_games')):
+    """
+    what a search found besides its move. ownership has one entry per point in
+    row-major order: the mean over the rollouts of 1 for black and -1 for white.
+    score_margin is the mean of black's area minus white's area and komi.
+    both are None when no rollout was scored, e.g. after a resignation
+    """
+
+
+class _OwnershipCounter(object):
+    """
+    sums of the ownership maps and score margins of scored rollouts
+    """
+    def __init__(self, num_points):
+        self.ownership = [0] * num_points
+        self.margin = 0.0
+        self.num_games = 0
+        self._lock = threading.Lock()
+
+    def add(self, playout_result):
+        game_result = playout_result.game_result
+        if game_result is None:
+            return
+        margin = game_result.winning_margin
+        if game_result.winner != Player.black:
+            margin = -margin
+        self.add_totals(playout_result.ownership, margin, 1)
+
+    def add_totals(self, ownership, margin, num_games):
+        """
+        add the sums collected by another counter, e.g. in a worker process
+        """
+        with self._lock:
+            self.ownership = [
+                total + owner
+                for total, owner in zip(self.ownership, ownership)
+            ]
+            self.margin += margin
+            self.num_games += num_games
+
+    def totals(self):
+        """
+        :return: picklable (ownership, margin, num_games) for add_totals
+        """
+        return self.ownership, self.margin, self.num_games
+
+    def get_analysis(self, move):
+        if self.num_games == 0:
+            return SearchAnalysis(move, None, None, 0)
+        return SearchAnalysis(
+            move,
+            [float(total) / self.num_games for total in self.ownership],
+            self.margin / self.num_games,
+            self.num_games,
+        )
+
+
+class NodeStats(object):
+    __slots__ = ('win_counts', 'num_rollouts')
+
+    def __init__(self):
         self.win_counts = {
             Player.black: 0,
             Player.white: 0
         }
         self.num_rollouts = 0
+
+
+class MCTSNode(object):
+    def __init__(self, game_state, parent=None, move=None, transpositions=None):
+        """
+        :param transpositions: optional TranspositionTable; nodes of the same position
+            then share one NodeStats, turning the tree into a DAG for statistics
+        """
+        self.game_state = game_state
+        self.parent = parent
+        self.move = move
+        self.transpositions = transpositions
+        self.stats = self._find_stats()
         self.children = []
         self.unvisited_moves = game_state.get_legal_moves()
 
+    def _find_stats(self):
+        # finished games are never shared: after two passes the position repeats
+        # the one before them, but the game is over
+        if self.transpositions is None or self.game_state.is_over():
+            return NodeStats()
+        key = (self.game_state.next_player, self.game_state.board.zobrist_hash())
+        stats = self.transpositions.get(key)
+        if stats is None:
+            stats = NodeStats()
+            self.transpositions.put(key, stats)
+        return stats
+
+    @property
+    def win_counts(self):
+        return self.stats.win_counts
+
+    @property
+    def num_rollouts(self):
+        return self.stats.num_rollouts
+
     def get_random_children(self):
         index = random.randint(0, len(self.unvisited_moves) - 1)
         new_move = self.unvisited_moves.pop(index)
         new_game_state = self.game_state.apply_move(new_move)
-        new_node = MCTSNode(new_game_state, self, new_move)
+        new_node = self.__class__(new_game_state, self, new_move, self.transpositions)
         self.children.append(new_node)
         return new_node
 
-    def record_win(self, winner):
-        self.win_counts[winner] += 1
-        self.num_rollouts += 1
+    def record_win(self, winner, num_games=1):
+        self.stats.win_counts[winner] += num_games
+        self.stats.num_rollouts += num_games
 
     def can_add_child(self):
         return len(self.unvisited_moves) > 0
@@ -75,20 +179,161 @@ class MCTSNode(object):
     def winning_frac(self, player):
         return float(self.win_counts[player]) / float(self.num_rollouts)
 
+    def find_child(self, move):
+        key = _move_key(move)
+        for child in self.children:
+            if _move_key(child.move) == key:
+                return child
+        return None
+
+    def prune(self, max_nodes):
+        """
+        keep at most max_nodes nodes of this subtree, the most visited first.
+        this node is always kept, even when max_nodes is below 1.
+        the moves of cut children go back to unvisited_moves so they can be expanded again
+        :return: number of nodes kept
+        """
+        max_nodes = max(max_nodes, 1)
+        kept = 0
+        tie_breaker = 0
+        frontier = [(-self.num_rollouts, tie_breaker, self)]
+        while frontier and kept < max_nodes:
+            _, _, node = heapq.heappop(frontier)
+            kept += 1
+            for child in node.children:
+                tie_breaker += 1
+                heapq.heappush(frontier, (-child.num_rollouts, tie_breaker, child))
+
+        for _, _, node in frontier:
+            node.parent.children.remove(node)
+            node.parent.unvisited_moves.append(node.move)
+            node.parent = None
+        return kept
+
 
 class MCTSAgent(agent.Agent):
-    def __init__(self, num_rounds,  temperature):
+    # rounds between two early stop checks
+    early_stop_interval = 50
+    # a game clock is spread over at least this many of our remaining moves
+    min_moves_left = 10
+    node_class = MCTSNode
+
+    def __init__(self, num_rounds,  temperature, reuse_tree=False, max_nodes=None,
+                 move_time_ms=None, game_time_ms=None, early_stop=False,
+                 transposition_table_size=None):
+        """
+        :param num_rounds: rollouts per move, or None to search until the time budget runs out
+        :param reuse_tree: continue from the subtree of the moves played since the last search
+        :param max_nodes: node budget for a reused tree, the least visited nodes are pruned
+        :param move_time_ms: wall clock budget per move
+        :param game_time_ms: wall clock budget for the whole game, split over the remaining moves
+        :param early_stop: stop as soon as the best root move cannot be overtaken
+            in the rounds or time left
+        :param transposition_table_size: share statistics between transposed positions,
+            keeping at most this many positions (least recently used are dropped)
+        """
+        assert num_rounds is not None or move_time_ms is not None or game_time_ms is not None
+        assert max_nodes is None or max_nodes >= 1
         agent.Agent.__init__(self)
         self.num_rounds = num_rounds
         self.temperature = temperature
+        self.reuse_tree = reuse_tree
+        self.max_nodes = max_nodes
+        self.move_time_ms = move_time_ms
+        self.game_time_ms = game_time_ms
+        self.early_stop = early_stop
+        self._last_root = None
+        self._ownership = None
+        self._transpositions = None
+        if transposition_table_size is not None:
+            self._transpositions = TranspositionTable(transposition_table_size)
+        self.reset_clock()
+
+    def reset_clock(self):
+        """
+        start a new game clock of game_time_ms
+        """
+        self._time_left_ms = self.game_time_ms
 
     def select_move(self, game_state):
-        root_node = MCTSNode(game_state)
-        root_node = self._create_markov_tree(root_node, self.num_rounds)
+        start = time.time()
+        root_node = None
+        if self.reuse_tree:
+            root_node = self._find_reusable_root(game_state)
+        if root_node is None:
+            root_node = self._create_root(game_state)
+        deadline = self._get_deadline(game_state, start)
+        root_node = self._create_markov_tree(root_node, self.num_rounds, deadline)
         self._print_top_ten_moves(game_state, root_node)
         best_move = self._get_best_move(game_state, root_node)
+        if self.reuse_tree:
+            self._last_root = root_node
+        if self._time_left_ms is not None:
+            self._time_left_ms -= 1000 * (time.time() - start)
         return best_move
 
+    def analyze(self, game_state):
+        """
+        select_move, also collecting the ownership map and score margin of every rollout
+        :return: SearchAnalysis
+        """
+        board = game_state.board
+        self._ownership = _OwnershipCounter(board.num_rows * board.num_cols)
+        try:
+            move = self.select_move(game_state)
+            return self._ownership.get_analysis(move)
+        finally:
+            self._ownership = None
+
+    def _create_root(self, game_state):
+        return self.node_class(game_state, transpositions=self._transpositions)
+
+    def _get_deadline(self, game_state, start):
+        """
+        :return: time.time() at which the search has to stop, or None without a time budget
+        """
+        budgets = []
+        if self.move_time_ms is not None:
+            budgets.append(self.move_time_ms)
+        if self._time_left_ms is not None:
+            moves_left = max(game_state.board.num_empty_points() // 2, self.min_moves_left)
+            budgets.append(max(self._time_left_ms, 0) / moves_left)
+        if not budgets:
+            return None
+        return start + min(budgets) / 1000.0
+
+    def _find_reusable_root(self, game_state):
+        """
+        walk the moves played since the previous search down the previous tree
+        :return: the detached node for game_state, or None if it was never expanded
+        """
+        last_root, self._last_root = self._last_root, None
+        if last_root is None:
+            return None
+
+        moves = []
+        state = game_state
+        while state is not None and state is not last_root.game_state:
+            moves.append(state.last_move)
+            state = state.previous_state
+        if state is None:
+            return None
+
+        node = last_root
+        for move in reversed(moves):
+            node = node.find_child(move)
+            if node is None:
+                return None
+        if node.game_state.next_player != game_state.next_player or \
+                node.game_state.board.zobrist_hash() != game_state.board.zobrist_hash():
+            return None
+
+        node.parent = None
+        node.game_state = game_state
+        if self.max_nodes is not None:
+            node.prune(self.max_nodes)
+        return node
+
     def _print_top_ten_moves(self, game_state, root_node):
         scored_moves = [
             (child.winning_frac(game_state.next_player), child.move, child.num_rollouts)
@@ -108,30 +353,91 @@ class MCTSAgent(agent.Agent):
                 best_move = child.move
         return best_move
 
-    def _create_markov_tree(self, root_node, num_rounds):
-        for i in range(num_rounds):
-            node = root_node
-            while (not node.can_add_child()) and (not node.is_terminal()):
-                node = self.select_child(node)
+    def _create_markov_tree(self, root_node, num_rounds, deadline=None):
+        """
+        :param num_rounds: maximum number of rounds, None for no limit
+        :param deadline: time.time() to stop at, None for no limit
+        """
+        start = time.time()
+        i = 0
+        while num_rounds is None or i < num_rounds:
+            if deadline is not None and time.time() >= deadline:
+                break
+            if self.early_stop and i > 0 and i % self.early_stop_interval == 0:
+                rounds_left = self._estimate_rounds_left(i, num_rounds, start, deadline)
+                if self._is_decided(root_node, rounds_left):
+                    break
+
+            self._play_round(root_node)
+            i += 1
+        return root_node
+
+    def _play_round(self, root_node):
+        """
+        select a leaf, expand it by one child, roll out from there and back up the winner
+        """
+        node = root_node
+        while (not node.can_add_child()) and (not node.is_terminal()):
+            node = self.select_child(node)
 
-            if node.can_add_child():
-                node = node.get_random_children()
+        if node.can_add_child():
+            node = node.get_random_children()
 
-            winner = self.simulate_random_game(node.game_state)
+        winner = self._playout(node.game_state).winner
 
-            while node is not None:
-                node.record_win(winner)
-                node = node.parent
-        return root_node
+        while node is not None:
+            node.record_win(winner)
+            node = node.parent
+
+    def _playout(self, game_state, with_moves=False):
+        """
+        random_playout that feeds analyze() when it is running
+        :return: PlayoutResult
+        """
+        if self._ownership is None:
+            return playout.random_playout(game_state, with_moves=with_moves)
+        result = playout.random_playout(game_state, with_ownership=True, with_moves=with_moves)
+        self._ownership.add(result)
+        return result
+
+    @staticmethod
+    def _estimate_rounds_left(rounds_done, num_rounds, start, deadline):
+        estimates = []
+        if num_rounds is not None:
+            estimates.append(num_rounds - rounds_done)
+        if deadline is not None:
+            now = time.time()
+            rate = rounds_done / max(now - start, 1e-6)
+            estimates.append(int(rate * max(deadline - now, 0.0)) + 1)
+        return min(estimates)
+
+    @staticmethod
+    def _is_decided(root_node, rounds_left):
+        """
+        the best child by winning fraction is decided when even if it loses every
+        remaining round and any other child wins all of them, its fraction stays higher
+        """
+        if root_node.can_add_child() or not root_node.children:
+            return False
+        player = root_node.game_state.next_player
+        best = max(root_node.children, key=lambda child: child.winning_frac(player))
+        worst_case = float(best.win_counts[player]) / (best.num_rollouts + rounds_left)
+        for child in root_node.children:
+            if child is best:
+                continue
+            best_case = float(child.win_counts[player] + rounds_left) / (child.num_rollouts + rounds_left)
+            if best_case >= worst_case:
+                return False
+        return True
 
     def select_child(self, node):
         """
         select a child according to the Upper Confidence bound for trees metric (UCT)
+        the parent's num_rollouts is maintained by record_win, so it is not summed here
         :param node:
         :return:
         """
-        total_rollouts = sum(child.num_rollouts for child in node.children)
-        log_rollouts = math.log(total_rollouts)
+        log_rollouts = math.log(node.num_rollouts)
 
         best_score = -1
         best_child = None
@@ -147,17 +453,10 @@ class MCTSAgent(agent.Agent):
 
     @staticmethod
     def simulate_random_game(game):
-        bots = {
-            Player.black: agent.RandomBot(),
-            Player.white: agent.RandomBot(),
-        }
-        while not game.is_over():
-            bot_move = bots[game.next_player].select_move(game)
-            game = game.apply_move(bot_move)
-        return game.get_winner()
+        return playout.simulate_random_game(game)
 
-    def _get_uct_score(self, parent_rollouts, child_rollouts, win_percentage, temperature):
-        exploration = math.sqrt(math.log(parent_rollouts) / child_rollouts)
+    def _get_uct_score(self, log_rollouts, child_rollouts, win_percentage, temperature):
+        exploration = math.sqrt(log_rollouts / child_rollouts)
         return win_percentage + temperature * exploration
 
 
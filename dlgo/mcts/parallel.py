@@ -0,0 +1,239 @@
+"""
+MCTS across a multiprocessing pool
+
+root parallelism: every worker grows an independent tree from the same position
+and the root children statistics are summed before choosing a move.
+leaf parallelism: one tree in this process, every selected leaf is rolled out
+leaf_batch_size times in the pool and all results are backed up together.
+"""
+
+import multiprocessing
+import random
+import time
+
+from dlgo.gamestate import GameState
+from dlgo.mcts import playout
+from dlgo.mcts.mcts import MCTSAgent, MCTSNode, _OwnershipCounter, _move_key
+from dlgo.types import Player
+
+
+__all__ = [
+    'RootParallelMCTSAgent',
+    'LeafParallelMCTSAgent',
+]
+
+
+def _detach(game_state):
+    """
+    picklable summary of game_state: pickling the previous_state chain of a
+    long game recurses once per move, but search only needs the board, the
+    superko history and the last two moves
+    """
+    previous_move = None
+    if game_state.previous_state is not None:
+        previous_move = game_state.previous_state.last_move
+    return (
+        game_state.board,
+        game_state.next_player,
+        game_state.previous_states,
+        game_state.last_move,
+        previous_move,
+    )
+
+
+def _attach(payload):
+    board, next_player, previous_states, last_move, previous_move = payload
+    previous_state = None
+    if last_move is not None:
+        previous_state = GameState(board, next_player.other, None, previous_move)
+    game_state = GameState(board, next_player, previous_state, last_move)
+    game_state.previous_states = previous_states
+    return game_state
+
+
+def _search_root(task):
+    """
+    :param task: time_ms is the time left for the search when it was sent, or None
+    :return: (move, wins, rollouts) of every root child, and the ownership totals
+        of the rollouts if with_ownership, else None
+    """
+    payload, num_rounds, temperature, time_ms, early_stop, with_ownership, seed = task
+    random.seed(seed)
+    game_state = _attach(payload)
+    bot = MCTSAgent(num_rounds, temperature, move_time_ms=time_ms, early_stop=early_stop)
+    if with_ownership:
+        bot._ownership = _new_ownership_counter(game_state)
+    deadline = bot._get_deadline(game_state, time.time())
+    root_node = bot._create_markov_tree(MCTSNode(game_state), num_rounds, deadline)
+    player = game_state.next_player
+    root_children = [
+        (child.move, child.win_counts[player], child.num_rollouts)
+        for child in root_node.children
+    ]
+    return root_children, _get_totals(bot._ownership)
+
+
+def _simulate(task):
+    """
+    :return: win counts, and the ownership totals of the rollouts if with_ownership, else None
+    """
+    payload, num_games, with_ownership, seed = task
+    random.seed(seed)
+    game_state = _attach(payload)
+    ownership = None
+    if with_ownership:
+        ownership = _new_ownership_counter(game_state)
+    win_counts = {Player.black: 0, Player.white: 0}
+    for _ in range(num_games):
+        result = playout.random_playout(game_state, with_ownership=with_ownership)
+        if ownership is not None:
+            ownership.add(result)
+        win_counts[result.winner] += 1
+    return win_counts, _get_totals(ownership)
+
+
+def _new_ownership_counter(game_state):
+    board = game_state.board
+    return _OwnershipCounter(board.num_rows * board.num_cols)
+
+
+def _get_totals(ownership):
+    if ownership is None:
+        return None
+    return ownership.totals()
+
+
+class _PoolAgent(MCTSAgent):
+    def __init__(self, num_rounds, temperature, num_workers=None, **kwargs):
+        """
+        :param num_workers: pool processes, one per CPU by default
+        the other arguments are those of MCTSAgent
+        """
+        MCTSAgent.__init__(self, num_rounds, temperature, **kwargs)
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        self.num_workers = num_workers
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(processes=self.num_workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _add_ownership(self, totals):
+        """
+        merge the ownership totals a worker collected for analyze()
+        """
+        if self._ownership is not None and totals is not None:
+            self._ownership.add_totals(*totals)
+
+    def _split(self, total):
+        """
+        :return: total divided into num_workers parts that differ by at most one
+        """
+        share, extra = divmod(total, self.num_workers)
+        return [share + 1 if i < extra else share for i in range(self.num_workers)]
+
+
+class RootParallelMCTSAgent(_PoolAgent):
+    def __init__(self, num_rounds, temperature, num_workers=None, **kwargs):
+        """
+        every worker searches until the shared deadline and stops early on its own.
+        reuse_tree, max_nodes and transposition_table_size are not supported
+        """
+        assert not kwargs.get('reuse_tree') and kwargs.get('transposition_table_size') is None
+        _PoolAgent.__init__(self, num_rounds, temperature, num_workers, **kwargs)
+
+    def select_move(self, game_state):
+        start = time.time()
+        payload = _detach(game_state)
+        deadline = self._get_deadline(game_state, start)
+        time_ms = None
+        if deadline is not None:
+            time_ms = 1000 * (deadline - time.time())
+        if self.num_rounds is None:
+            worker_rounds = [None] * self.num_workers
+        else:
+            worker_rounds = [n for n in self._split(self.num_rounds) if n > 0]
+        tasks = [
+            (payload, num_rounds, self.temperature, time_ms, self.early_stop,
+             self._ownership is not None, random.getrandbits(32))
+            for num_rounds in worker_rounds
+        ]
+
+        merged = {}
+        for root_children, totals in self._get_pool().map(_search_root, tasks):
+            self._add_ownership(totals)
+            for move, wins, num_rollouts in root_children:
+                stats = merged.setdefault(_move_key(move), [move, 0, 0])
+                stats[1] += wins
+                stats[2] += num_rollouts
+
+        scored_moves = [
+            (float(wins) / num_rollouts, move, num_rollouts)
+            for move, wins, num_rollouts in merged.values()
+        ]
+        scored_moves.sort(key=lambda x: x[0], reverse=True)
+        for s, m, n in scored_moves[:10]:
+            print('%s - %.3f (%d)' % (m, s, n))
+        if self._time_left_ms is not None:
+            self._time_left_ms -= 1000 * (time.time() - start)
+        if not scored_moves:
+            return None
+        return scored_moves[0][1]
+
+
+class LeafParallelMCTSAgent(_PoolAgent):
+    def __init__(self, num_rounds, temperature, num_workers=None, leaf_batch_size=None, **kwargs):
+        """
+        :param num_rounds: total rollouts per move, leaf_batch_size of them per leaf
+        :param leaf_batch_size: rollouts per selected leaf, num_workers by default
+        """
+        _PoolAgent.__init__(self, num_rounds, temperature, num_workers, **kwargs)
+        if leaf_batch_size is None:
+            leaf_batch_size = self.num_workers
+        self.leaf_batch_size = leaf_batch_size
+
+    def _create_markov_tree(self, root_node, num_rounds, deadline=None):
+        """
+        one round of MCTSAgent per leaf, each rolled out leaf_batch_size times
+        """
+        num_leaves = None
+        if num_rounds is not None:
+            num_leaves = max(1, num_rounds // self.leaf_batch_size)
+        return MCTSAgent._create_markov_tree(self, root_node, num_leaves, deadline)
+
+    def _is_decided(self, root_node, rounds_left):
+        # rounds_left counts leaves, the statistics count rollouts
+        return MCTSAgent._is_decided(root_node, rounds_left * self.leaf_batch_size)
+
+    def _play_round(self, root_node):
+        node = root_node
+        while (not node.can_add_child()) and (not node.is_terminal()):
+            node = self.select_child(node)
+
+        if node.can_add_child():
+            node = node.get_random_children()
+
+        payload = _detach(node.game_state)
+        tasks = [
+            (payload, num_games, self._ownership is not None, random.getrandbits(32))
+            for num_games in self._split(self.leaf_batch_size)
+            if num_games > 0
+        ]
+        win_counts = {Player.black: 0, Player.white: 0}
+        for counts, totals in self._get_pool().map(_simulate, tasks):
+            self._add_ownership(totals)
+            for player, wins in counts.items():
+                win_counts[player] += wins
+
+        while node is not None:
+            for winner, wins in win_counts.items():
+                node.record_win(winner, wins)
+            node = node.parent
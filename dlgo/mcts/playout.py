@@ -0,0 +1,145 @@
+"""
+random rollouts for MCTS on a mutable array board
+
+the policy matches agent.RandomBot: a uniformly random legal move that does not
+fill one of the mover's own eyes, or a pass when there is none. rollouts only
+enforce simple ko, not positional superko, and stop after max_moves moves
+"""
+
+import random
+from collections import namedtuple
+
+from dlgo import board_fast
+from dlgo.board_fast import BLACK, WHITE, BORDER
+from dlgo.scoring import KOMI, area_score
+from dlgo.types import Player
+
+
+__all__ = [
+    'PlayoutBoard',
+    'PlayoutResult',
+    'random_playout',
+    'simulate_random_game',
+]
+
+
+class PlayoutResult(namedtuple('PlayoutResult', 'winner game_result ownership moves')):
+    """
+    ownership is None unless requested, otherwise one entry per point in
+    row-major order: 1 for black, -1 for white and 0 for dame.
+    moves is None unless requested, otherwise the (Player, Point) of every stone
+    played in the rollout, in order
+    """
+
+
+class PlayoutBoard(board_fast.Board):
+    def play_out(self, color, max_moves, passes=0, moves=None):
+        """
+        play random moves, alternating colors, until two passes in a row or max_moves
+        :param color: BLACK or WHITE, the color to move first
+        :param passes: number of passes that immediately precede this position
+        :param moves: optional list, (color, padded index) of every stone played is appended
+        """
+        num_moves = 0
+        while passes < 2 and num_moves < max_moves:
+            p = self._select_random_move(color)
+            if p:
+                self._place(color, p)
+                if moves is not None:
+                    moves.append((color, p))
+                passes = 0
+            else:
+                passes += 1
+            color = BLACK + WHITE - color
+            num_moves += 1
+
+    def _select_random_move(self, color):
+        """
+        draw candidates from the empty list without replacement by swapping every
+        rejected point behind a shrinking window
+        :return: padded index of the move, or 0 to pass
+        """
+        empty = self._empty
+        empty_pos = self._empty_pos
+        rand = random.random
+        num_candidates = len(empty)
+        while num_candidates:
+            pos = int(rand() * num_candidates)
+            p = empty[pos]
+            if self._is_playable(color, p):
+                return p
+            num_candidates -= 1
+            last = empty[num_candidates]
+            empty[pos] = last
+            empty[num_candidates] = p
+            empty_pos[last] = pos
+            empty_pos[p] = num_candidates
+        return 0
+
+    def _is_playable(self, color, p):
+        if self._ko_point == p and self._ko_color == color:
+            return False
+        return not self._is_eye(color, p) and not self._is_self_capture(color, p)
+
+    def _is_eye(self, color, p):
+        """
+        same rule as agent.helper.is_point_an_eye on the padded arrays
+        """
+        stones = self._stones
+        for n in self._layout.neighbors[p]:
+            neighbor_color = stones[n]
+            if neighbor_color != color and neighbor_color != BORDER:
+                return False
+
+        friendly_corners = 0
+        off_board_corners = 0
+        for corner in self._layout.diagonals[p]:
+            corner_color = stones[corner]
+            if corner_color == color:
+                friendly_corners += 1
+            elif corner_color == BORDER:
+                off_board_corners += 1
+
+        if off_board_corners > 0:
+            return off_board_corners + friendly_corners == 4
+        return friendly_corners >= 3
+
+    def score(self, komi=KOMI, with_ownership=False):
+        """
+        :return: (GameResult, ownership list or None), see scoring.area_score
+        """
+        layout = self._layout
+        return area_score(self._stones, layout.indices, layout.neighbors, komi, with_ownership)
+
+
+def random_playout(game_state, max_moves=None, with_ownership=False, with_moves=False):
+    """
+    finish game_state with random moves on a copy of its board
+    :param max_moves: rollout length cap, 3 moves per point by default
+    :return: PlayoutResult
+    """
+    board = game_state.board
+    if max_moves is None:
+        max_moves = 3 * board.num_rows * board.num_cols
+
+    playout_board = PlayoutBoard.from_board(board)
+    moves = [] if with_moves else None
+    if not game_state.is_over():
+        last_move = game_state.last_move
+        passes = 1 if last_move is not None and last_move.is_pass else 0
+        playout_board.play_out(game_state.next_player.value, max_moves, passes, moves)
+    elif game_state.last_move.is_resign:
+        return PlayoutResult(game_state.get_winner(), None, None, moves)
+
+    game_result, ownership = playout_board.score(with_ownership=with_ownership)
+    if moves is not None:
+        points = playout_board._layout.points
+        moves = [(Player(color), points[p]) for color, p in moves]
+    return PlayoutResult(game_result.winner, game_result, ownership, moves)
+
+
+def simulate_random_game(game_state, max_moves=None):
+    """
+    :return: winning Player of a random rollout from game_state
+    """
+    return random_playout(game_state, max_moves).winner
@@ -0,0 +1,217 @@
+"""
+MCTS guided by a Keras model (PUCT)
+
+children are selected by Q + c_puct * P * sqrt(N) / (1 + n), with the prior P taken
+from the model's move probabilities. leaves are not evaluated one at a time:
+up to batch_size leaves are collected, encoded and sent through the model in one
+call. virtual loss makes every leaf in flight look like a lost game, so the
+following descents of the same batch spread over other branches.
+"""
+
+import math
+
+import numpy as np
+
+from dlgo import agent
+from dlgo.mcts import playout
+from dlgo.move import Move
+
+
+__all__ = [
+    'PUCTAgent',
+]
+
+
+class PUCTNode(object):
+    def __init__(self, game_state, parent=None, move=None, prior=1.0):
+        """
+        :param game_state: None to apply move to the parent's state on first use
+        """
+        self._game_state = game_state
+        self.parent = parent
+        self.move = move
+        self.prior = prior
+        # value_sum is from the point of view of the player who played move
+        self.visit_count = 0
+        self.value_sum = 0.0
+        self.virtual_losses = 0
+        self.children = None
+
+    @property
+    def game_state(self):
+        if self._game_state is None:
+            self._game_state = self.parent.game_state.apply_move(self.move)
+        return self._game_state
+
+    def is_expanded(self):
+        return self.children is not None
+
+    def is_terminal(self):
+        return self.game_state.is_over()
+
+    def expand(self, priors):
+        """
+        :param priors: list of (move, unnormalized prior), one child each
+        """
+        total = sum(prior for _, prior in priors)
+        self.children = []
+        for move, prior in priors:
+            if total > 0:
+                prior /= total
+            else:
+                prior = 1.0 / len(priors)
+            self.children.append(PUCTNode(None, self, move, prior))
+
+
+class PUCTAgent(agent.Agent):
+    def __init__(self, model, encoder, num_rounds, c_puct=1.5, batch_size=8,
+                 virtual_loss=1, channels_last=False):
+        """
+        :param model: Keras model on encoder planes, predicting num_points move
+            probabilities (num_points + 1 with pass last). a model with two outputs
+            [policy, value] also predicts the value in [-1, 1] for the player to move,
+            otherwise leaves are valued by a random rollout
+        :param num_rounds: leaf evaluations per move
+        :param batch_size: leaves per model call
+        :param virtual_loss: lost games added to every node of a path in flight
+        :param channels_last: feed the model (N, rows, cols, planes) instead of
+            the encoder's (N, planes, rows, cols)
+        """
+        agent.Agent.__init__(self)
+        self.model = model
+        self.encoder = encoder
+        self.num_rounds = num_rounds
+        self.c_puct = c_puct
+        self.batch_size = batch_size
+        self.virtual_loss = virtual_loss
+        self.channels_last = channels_last
+
+    def select_move(self, game_state):
+        root = PUCTNode(game_state)
+        self.search(root)
+        if not root.children:
+            return Move.pass_turn()
+
+        scored_moves = [
+            (child.value_sum / child.visit_count, child.move, child.visit_count)
+            for child in root.children
+            if child.visit_count > 0
+        ]
+        scored_moves.sort(key=lambda x: x[2], reverse=True)
+        for s, m, n in scored_moves[:10]:
+            print('%s - %.3f (%d)' % (m, (s + 1) / 2, n))
+        if not scored_moves:
+            return Move.pass_turn()
+        return scored_moves[0][1]
+
+    def search(self, root):
+        rounds = 0
+        while rounds < self.num_rounds:
+            pending = []
+            while len(pending) < min(self.batch_size, self.num_rounds - rounds):
+                leaf = self._descend(root)
+                if leaf.is_terminal():
+                    self._backup(leaf, self._rollout_value(leaf.game_state))
+                    rounds += 1
+                elif leaf in pending:
+                    # the tree above it is still waiting for this batch
+                    self._backup(leaf, None)
+                    break
+                else:
+                    pending.append(leaf)
+            if pending:
+                self._evaluate(pending)
+                rounds += len(pending)
+        return root
+
+    def _descend(self, node):
+        """
+        walk down to a leaf, adding virtual loss to every node on the way
+        """
+        node.virtual_losses += 1
+        while node.is_expanded() and node.children:
+            node = self.select_child(node)
+            node.virtual_losses += 1
+        return node
+
+    def select_child(self, node):
+        parent_visits = node.visit_count + self.virtual_loss * node.virtual_losses
+        sqrt_visits = math.sqrt(max(parent_visits, 1))
+
+        best_score = None
+        best_child = None
+        for child in node.children:
+            losses = self.virtual_loss * child.virtual_losses
+            visits = child.visit_count + losses
+            q = (child.value_sum - losses) / visits if visits > 0 else 0.0
+            score = q + self.c_puct * child.prior * sqrt_visits / (1 + visits)
+            if best_score is None or score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+    def _evaluate(self, leaves):
+        batch = np.stack([self.encoder.encode(leaf.game_state) for leaf in leaves])
+        if self.channels_last:
+            batch = np.moveaxis(batch, 1, -1)
+        outputs = self.model.predict_on_batch(batch)
+        if isinstance(outputs, (list, tuple)):
+            policies, values = outputs
+            values = np.asarray(values).reshape(len(leaves))
+        else:
+            policies, values = outputs, None
+        policies = np.asarray(policies)
+
+        for i, leaf in enumerate(leaves):
+            leaf.expand(self._get_priors(leaf.game_state, policies[i]))
+            if values is not None:
+                value = float(values[i])
+            else:
+                value = self._rollout_value(leaf.game_state)
+            self._backup(leaf, value)
+
+    def _get_priors(self, game_state, policy):
+        """
+        :return: list of (move, prior) for the legal moves except resign
+        """
+        priors = []
+        pass_move = None
+        for move in game_state.get_legal_moves():
+            if move.is_play:
+                priors.append((move, float(policy[self.encoder.encode_point(move.point)])))
+            elif move.is_pass:
+                pass_move = move
+        if pass_move is not None:
+            num_points = self.encoder.num_points()
+            if len(policy) > num_points:
+                pass_prior = float(policy[num_points])
+            else:
+                # without a pass entry, pass gets the smallest prior of any legal move
+                pass_prior = min(prior for _, prior in priors) if priors else 1.0
+            priors.append((pass_move, pass_prior))
+        return priors
+
+    @staticmethod
+    def _rollout_value(game_state):
+        """
+        finished games are scored as they are
+        :return: 1 if the player to move wins a random rollout, -1 otherwise
+        """
+        winner = playout.simulate_random_game(game_state)
+        return 1.0 if winner == game_state.next_player else -1.0
+
+    def _backup(self, leaf, value):
+        """
+        remove the virtual loss of the path to leaf and, unless value is None, add value
+        :param value: result for the player to move at leaf
+        """
+        node = leaf
+        if value is not None:
+            value = -value
+        while node is not None:
+            node.virtual_losses -= 1
+            if value is not None:
+                node.visit_count += 1
+                node.value_sum += value
+                value = -value
+            node = node.parent
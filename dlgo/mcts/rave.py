@@ -0,0 +1,119 @@
+"""
+MCTS with rapid action value estimation (RAVE)
+
+every node also keeps all-moves-as-first (AMAF) statistics: a move counts for the
+node whenever the player to move there plays it anywhere later in the round,
+in the tree or in the rollout. the AMAF value of a child is blended into its
+winning fraction with a weight that fades out as the child gets visits of its own.
+"""
+
+import math
+from collections import deque
+
+from dlgo.mcts.mcts import MCTSAgent, MCTSNode
+
+
+__all__ = [
+    'RaveMCTSAgent',
+]
+
+
+class RaveMCTSNode(MCTSNode):
+    def __init__(self, game_state, parent=None, move=None, transpositions=None):
+        MCTSNode.__init__(self, game_state, parent, move, transpositions)
+        # point -> [wins of the player to move here, games]
+        self.amaf = {}
+
+    def record_amaf(self, moves, winner):
+        """
+        :param moves: (Player, Point) played after this node, in order; only the first
+            play on a point by the player to move here counts
+        """
+        player = self.game_state.next_player
+        won = 1 if winner == player else 0
+        seen = set()
+        for color, point in moves:
+            if color != player or point in seen:
+                continue
+            seen.add(point)
+            stats = self.amaf.get(point)
+            if stats is None:
+                self.amaf[point] = [won, 1]
+            else:
+                stats[0] += won
+                stats[1] += 1
+
+
+class RaveMCTSAgent(MCTSAgent):
+    node_class = RaveMCTSNode
+
+    def __init__(self, num_rounds, temperature, rave_equivalence=1000, **kwargs):
+        """
+        :param rave_equivalence: number of visits at which a child's own statistics and
+            its AMAF statistics get about the same weight, see rave_weight
+        the other arguments are those of MCTSAgent
+        """
+        MCTSAgent.__init__(self, num_rounds, temperature, **kwargs)
+        self.rave_equivalence = rave_equivalence
+
+    def rave_weight(self, num_rollouts):
+        """
+        weight of the AMAF value for a child with num_rollouts visits,
+        the hand-selected schedule sqrt(k / (3n + k)) of Gelly and Silver
+        """
+        k = self.rave_equivalence
+        return math.sqrt(k / (3.0 * num_rollouts + k))
+
+    def _play_round(self, root_node):
+        node = root_node
+        while (not node.can_add_child()) and (not node.is_terminal()):
+            node = self.select_child(node)
+
+        if node.can_add_child():
+            node = node.get_random_children()
+
+        result = self._playout(node.game_state, with_moves=True)
+        moves = deque(result.moves or ())
+
+        while node is not None:
+            node.record_win(result.winner)
+            node.record_amaf(moves, result.winner)
+            if node.parent is not None and node.move.is_play:
+                moves.appendleft((node.parent.game_state.next_player, node.move.point))
+            node = node.parent
+
+    def select_child(self, node):
+        """
+        UCT with each child's winning fraction blended with the AMAF value of its move.
+        pass, resign and moves never played in a rollout have no AMAF value and are
+        blended with the node's own winning fraction instead, otherwise their noisy
+        raw fractions would stand out against the smoothed ones
+        """
+        log_rollouts = math.log(node.num_rollouts)
+        player = node.game_state.next_player
+        node_value = node.winning_frac(player)
+
+        best_score = -1
+        best_child = None
+        for child in node.children:
+            amaf_value = node_value
+            amaf = node.amaf.get(child.move.point) if child.move.is_play else None
+            if amaf is not None:
+                amaf_value = float(amaf[0]) / amaf[1]
+            beta = self.rave_weight(child.num_rollouts)
+            value = (1 - beta) * child.winning_frac(player) + beta * amaf_value
+            uct_score = self._get_uct_score(log_rollouts, child.num_rollouts, value, self.temperature)
+
+            if uct_score > best_score:
+                best_score = uct_score
+                best_child = child
+        return best_child
+
+    def _get_best_move(self, game_state, root_node):
+        """
+        the most visited child: RAVE spends few rounds on moves with poor AMAF values,
+        so the winning fraction of a rarely visited child is mostly noise
+        """
+        if not root_node.children:
+            return None
+        return max(root_node.children, key=lambda child: child.num_rollouts).move
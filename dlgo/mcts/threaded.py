@@ -0,0 +1,115 @@
+"""
+MCTS with several threads descending one shared tree
+
+every node has its own lock, held only to pick or create a child and to record
+a result; rollouts run without any lock. a thread counts as virtual_loss lost
+games on every node of its path until its result is backed up, so the other
+threads prefer different paths meanwhile. under the GIL this only pays off when
+leaf work releases it (native playouts, model inference, I/O).
+"""
+
+import math
+import threading
+import time
+
+from dlgo.mcts.mcts import MCTSAgent, MCTSNode
+
+
+__all__ = [
+    'ThreadedMCTSAgent',
+]
+
+
+class ThreadedMCTSNode(MCTSNode):
+    def __init__(self, game_state, parent=None, move=None, transpositions=None):
+        MCTSNode.__init__(self, game_state, parent, move, transpositions)
+        self.lock = threading.Lock()
+        # threads whose round passes through this node and is not backed up yet
+        self.virtual_losses = 0
+
+
+class ThreadedMCTSAgent(MCTSAgent):
+    node_class = ThreadedMCTSNode
+
+    def __init__(self, num_rounds, temperature, num_threads=4, virtual_loss=1, **kwargs):
+        """
+        :param num_threads: threads searching the tree concurrently
+        :param virtual_loss: lost games counted per thread in flight through a node
+        the other arguments are those of MCTSAgent, except early_stop and
+        transposition_table_size which are not supported
+        """
+        assert not kwargs.get('early_stop') and kwargs.get('transposition_table_size') is None
+        MCTSAgent.__init__(self, num_rounds, temperature, **kwargs)
+        self.num_threads = num_threads
+        self.virtual_loss = virtual_loss
+
+    def _create_markov_tree(self, root_node, num_rounds, deadline=None):
+        rounds = {'started': 0}
+        rounds_lock = threading.Lock()
+
+        def claim_round():
+            with rounds_lock:
+                if num_rounds is not None and rounds['started'] >= num_rounds:
+                    return False
+                rounds['started'] += 1
+                return True
+
+        def work():
+            while claim_round():
+                self._play_round(root_node)
+                if deadline is not None and time.time() >= deadline:
+                    break
+
+        threads = [threading.Thread(target=work) for _ in range(self.num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return root_node
+
+    def _play_round(self, root_node):
+        node = root_node
+        with node.lock:
+            node.virtual_losses += 1
+        while True:
+            with node.lock:
+                expanded = node.can_add_child()
+                if expanded:
+                    child = node.get_random_children()
+                elif node.is_terminal():
+                    break
+                else:
+                    child = self.select_child(node)
+                with child.lock:
+                    child.virtual_losses += 1
+            node = child
+            if expanded:
+                break
+
+        winner = self._playout(node.game_state).winner
+
+        while node is not None:
+            with node.lock:
+                node.record_win(winner)
+                node.virtual_losses -= 1
+            node = node.parent
+
+    def select_child(self, node):
+        """
+        UCT on statistics that count the rounds in flight as losses,
+        called with node.lock held
+        """
+        log_rollouts = math.log(node.num_rollouts + self.virtual_loss * node.virtual_losses)
+        player = node.game_state.next_player
+
+        best_score = -1
+        best_child = None
+        for child in node.children:
+            num_rollouts = child.num_rollouts + self.virtual_loss * child.virtual_losses
+            win_percentage = float(child.win_counts[player]) / num_rollouts
+            uct_score = self._get_uct_score(log_rollouts, num_rollouts, win_percentage, self.temperature)
+
+            if uct_score > best_score:
+                best_score = uct_score
+                best_child = child
+        return best_child
@@ -0,0 +1,32 @@
+from collections import OrderedDict
+
+
+__all__ = [
+    'TranspositionTable',
+]
+
+
+class TranspositionTable(object):
+    """
+    bounded map from (next_player, zobrist hash) to search statistics.
+    when it is full the least recently used entry is dropped; nodes that already
+    hold the dropped statistics keep them, they are just no longer shared
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,113 @@
+"""
+MCTS with progressive widening
+
+a node may only have ceil(constant * num_rollouts ** exponent) children, and its
+moves are expanded best first by a move order instead of at random. on large
+boards this keeps the rounds on a few plausible moves per node, so the tree
+grows deep instead of spending the whole budget on one visit per legal move.
+"""
+
+import math
+import random
+
+from dlgo.agent.helper import is_point_an_eye
+from dlgo.mcts.mcts import MCTSAgent, MCTSNode
+
+
+__all__ = [
+    'ProgressiveWidening',
+    'WideningMCTSAgent',
+    'heuristic_move_order',
+]
+
+
+def heuristic_move_order(game_state, move):
+    """
+    cheap move priority, higher is expanded first: moves close to the last move,
+    then moves off the first line; filling an own eye, passing and resigning last
+    """
+    if move.is_resign:
+        return -20.0
+    if move.is_pass:
+        return -10.0
+    board = game_state.board
+    point = move.point
+    if is_point_an_eye(board, point, game_state.next_player):
+        return -5.0
+
+    score = random.random() * 0.1
+    line = min(point.row, point.col, board.num_rows + 1 - point.row, board.num_cols + 1 - point.col)
+    if line == 1:
+        score -= 1.0
+    elif line > 2:
+        score += 0.5
+
+    last_move = game_state.last_move
+    if last_move is not None and last_move.is_play:
+        distance = max(abs(point.row - last_move.point.row), abs(point.col - last_move.point.col))
+        if distance <= 2:
+            score += 3 - distance
+    return score
+
+
+class ProgressiveWidening(object):
+    def __init__(self, constant=2.0, exponent=0.5, move_order=heuristic_move_order):
+        """
+        :param move_order: function (game_state, move) -> priority, higher is expanded
+            first, e.g. the probability of a policy model
+        """
+        self.constant = constant
+        self.exponent = exponent
+        self.move_order = move_order
+
+    def max_children(self, num_rollouts):
+        return max(1, int(math.ceil(self.constant * num_rollouts ** self.exponent)))
+
+    def order(self, game_state, moves):
+        """
+        sort moves in place so that the best move is last
+        """
+        moves.sort(key=lambda move: self.move_order(game_state, move))
+
+
+class WideningMCTSNode(MCTSNode):
+    def __init__(self, game_state, parent=None, move=None, transpositions=None, widening=None):
+        MCTSNode.__init__(self, game_state, parent, move, transpositions)
+        self.widening = widening
+        # moves are ordered on the first expansion, most nodes are never expanded.
+        # prune() puts moves back, which calls for ordering them again
+        self._num_ordered = None
+
+    def can_add_child(self):
+        return len(self.unvisited_moves) > 0 and \
+            len(self.children) < self.widening.max_children(self.num_rollouts)
+
+    def get_random_children(self):
+        """
+        expand the next move in move order, despite the name
+        """
+        if self._num_ordered != len(self.unvisited_moves):
+            self.widening.order(self.game_state, self.unvisited_moves)
+        new_move = self.unvisited_moves.pop()
+        self._num_ordered = len(self.unvisited_moves)
+        new_game_state = self.game_state.apply_move(new_move)
+        new_node = self.__class__(new_game_state, self, new_move, self.transpositions, self.widening)
+        self.children.append(new_node)
+        return new_node
+
+
+class WideningMCTSAgent(MCTSAgent):
+    node_class = WideningMCTSNode
+
+    def __init__(self, num_rounds, temperature, widening=None, **kwargs):
+        """
+        :param widening: ProgressiveWidening, the default settings if None
+        the other arguments are those of MCTSAgent
+        """
+        MCTSAgent.__init__(self, num_rounds, temperature, **kwargs)
+        if widening is None:
+            widening = ProgressiveWidening()
+        self.widening = widening
+
+    def _create_root(self, game_state):
+        return self.node_class(game_state, transpositions=self._transpositions, widening=self.widening)
@@ -1,6 +1,17 @@
 from __future__ import absolute_import
 from collections import namedtuple
-from dlgo.types import Player, Point
+
+import numpy as np
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
+from dlgo.board_fast import EMPTY, BLACK, WHITE, BORDER
+from dlgo.geometry import get_geometry
+from dlgo.types import Player
+
+KOMI = 7.5
 
 
 class Territory:
@@ -48,57 +59,199 @@ class GameResult(namedtuple('GameResult', 'b w komi')):
 
 def evaluate_territory(board):
     status = {}
-    for r in range(1, board.num_rows + 1):
-        for c in range(1, board.num_cols + 1):
-            point = Point(row=r, col=c)
-            if point in status:
-                continue
-            stone = board.get_color_on_point(point)
-            if stone is not None:
-                status[point] = stone
+    for point in get_geometry(board.num_rows, board.num_cols).points:
+        if point in status:
+            continue
+        stone = board.get_color_on_point(point)
+        if stone is not None:
+            status[point] = stone
+        else:
+            group, neighbors = _collect_region(point, board)
+            if len(neighbors) == 1:
+                neighbor_stone = neighbors.pop()
+                stone_str = 'b' if neighbor_stone == Player.black else 'w'
+                fill_with = 'territory_' + stone_str
             else:
-                group, neighbors = _collect_region(point, board)
-                if len(neighbors) == 1:
-                    neighbor_stone = neighbors.pop()
-                    stone_str = 'b' if neighbor_stone == Player.black else 'w'
-                    fill_with = 'territory_' + stone_str
-                else:
-                    fill_with = 'dame'
+                fill_with = 'dame'
 
-                for pos in group:
-                    status[pos] = fill_with
+            for pos in group:
+                status[pos] = fill_with
 
     return Territory(status)
 
 
-def _collect_region(start_position, board, visited=None):
-    if visited is None:
-        visited = {}
-    if start_position in visited:
-        return [], set()
+def _collect_region(start_position, board):
+    """
+    :return: the points of the same color connected to start_position, and the
+        colors bordering them
+    """
+    neighbors = get_geometry(board.num_rows, board.num_cols).neighbors
+    here = board.get_color_on_point(start_position)
     all_points = {start_position}
     all_borders = set()
-    visited[start_position] = True
-    here = board.get_color_on_point(start_position)
-    deltas = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    for delta_r, delta_c in deltas:
-        next_point = Point(row=start_position.row + delta_r, col=start_position.col + delta_c)
-        if not board.is_point_on_grid(next_point):
-            continue
-        neighbor = board.get_color_on_point(next_point)
-        if neighbor == here:
-            points, borders = _collect_region(next_point, board, visited)
-            all_points += points
-            all_borders |= borders
-        else:
-            all_borders.add(neighbor)
+    pending = [start_position]
+    while pending:
+        point = pending.pop()
+        for next_point in neighbors[point]:
+            neighbor = board.get_color_on_point(next_point)
+            if neighbor != here:
+                all_borders.add(neighbor)
+            elif next_point not in all_points:
+                all_points.add(next_point)
+                pending.append(next_point)
     return all_points, all_borders
 
 
-def compute_game_result(game_state):
-    territory = evaluate_territory(game_state.board)
-    return GameResult(
-        territory.num_black_territory + territory.num_black_stones,
-        territory.num_white_territory + territory.num_white_stones,
-        komi=7.5
+def area_score(stones, indices, neighbors, komi=KOMI, with_ownership=False):
+    """
+    area score in one pass over a flat board: an empty region bordered by one color
+    only is that color's territory, otherwise dame
+    :param stones: EMPTY, BLACK, WHITE or BORDER per index, as in dlgo.board_fast
+    :param indices: the on-grid indices in row-major order
+    :param neighbors: neighbor indices per index
+    :return: (GameResult, ownership list or None), ownership has one entry per
+        point in row-major order: 1 for black, -1 for white and 0 for dame
+    """
+    owner = [EMPTY] * len(stones)
+    seen = [False] * len(stones)
+    counts = [0, 0, 0, 0]
+
+    for idx in indices:
+        color = stones[idx]
+        if color != EMPTY:
+            counts[color] += 1
+            owner[idx] = color
+            continue
+        if seen[idx]:
+            continue
+
+        region = [idx]
+        seen[idx] = True
+        borders = 0
+        pending = [idx]
+        while pending:
+            point = pending.pop()
+            for n in neighbors[point]:
+                neighbor_color = stones[n]
+                if neighbor_color == EMPTY:
+                    if not seen[n]:
+                        seen[n] = True
+                        region.append(n)
+                        pending.append(n)
+                elif neighbor_color != BORDER:
+                    borders |= neighbor_color
+
+        if borders == BLACK or borders == WHITE:
+            counts[borders] += len(region)
+            for point in region:
+                owner[point] = borders
+
+    game_result = GameResult(counts[BLACK], counts[WHITE], komi=komi)
+    ownership = None
+    if with_ownership:
+        sign = (0, 1, -1)
+        ownership = [sign[owner[idx]] for idx in indices]
+    return game_result, ownership
+
+
+def score_board(board, komi=KOMI, with_ownership=False):
+    """
+    area_score of any board, read through get_color_on_point
+    """
+    geometry = get_geometry(board.num_rows, board.num_cols)
+    stones = [BORDER] * geometry.padded_size
+    for point, idx in geometry.padded_index.items():
+        color = board.get_color_on_point(point)
+        stones[idx] = EMPTY if color is None else color.value
+    return area_score(stones, geometry.padded_indices, geometry.padded_neighbors, komi, with_ownership)
+
+
+class BoardScores(namedtuple('BoardScores', 'b w komi ownership')):
+    """
+    area scores of N boards: b and w are int arrays of length N, ownership is an
+    (N, rows, cols) int8 array with 1 for black, -1 for white and 0 for dame
+    """
+    @property
+    def winner(self):
+        """
+        :return: int8 array of Player values, ties go to white as in GameResult
+        """
+        return np.where(self.b > self.w + self.komi, BLACK, WHITE).astype(np.int8)
+
+    @property
+    def winning_margin(self):
+        return np.abs(self.b - (self.w + self.komi))
+
+
+def score_boards(stones, komi=KOMI):
+    """
+    area score many finished boards at once, with the same rules as area_score
+    :param stones: (N, rows, cols) array of EMPTY, BLACK and WHITE
+    :return: BoardScores
+    """
+    stones = np.asarray(stones)
+    empty = stones == EMPTY
+    if ndimage is not None:
+        black_reach, white_reach = _label_reach(stones, empty)
+    else:
+        black_reach = _flood_reach(stones == BLACK, empty)
+        white_reach = _flood_reach(stones == WHITE, empty)
+
+    ownership = np.zeros(stones.shape, dtype=np.int8)
+    ownership[black_reach & ~white_reach] = 1
+    ownership[white_reach & ~black_reach] = -1
+    area_axes = (1, 2)
+    return BoardScores(
+        np.count_nonzero(ownership == 1, axis=area_axes),
+        np.count_nonzero(ownership == -1, axis=area_axes),
+        komi,
+        ownership,
     )
+
+
+def _dilate(mask):
+    """
+    mask plus its four neighbors on each board, nothing leaks between boards
+    """
+    grown = mask.copy()
+    grown[:, 1:, :] |= mask[:, :-1, :]
+    grown[:, :-1, :] |= mask[:, 1:, :]
+    grown[:, :, 1:] |= mask[:, :, :-1]
+    grown[:, :, :-1] |= mask[:, :, 1:]
+    return grown
+
+
+def _flood_reach(color, empty):
+    """
+    :return: the stones of color plus every empty point connected to them
+        through empty points
+    """
+    reach = color
+    while True:
+        grown = _dilate(reach) & (empty | color)
+        if np.array_equal(grown, reach):
+            return reach
+        reach = grown
+
+
+def _label_reach(stones, empty):
+    """
+    _flood_reach for both colors from one connected component labelling of the
+    empty points, the batch axis is not connected
+    """
+    structure = np.zeros((3, 3, 3), dtype=bool)
+    structure[1] = ndimage.generate_binary_structure(2, 1)
+    labels, num_labels = ndimage.label(empty, structure)
+    reaches = []
+    for color in (BLACK, WHITE):
+        is_color = stones == color
+        touches = np.zeros(num_labels + 1, dtype=bool)
+        touches[labels[_dilate(is_color) & empty]] = True
+        touches[0] = False
+        reaches.append(is_color | touches[labels])
+    return reaches
+
+
+def compute_game_result(game_state):
+    game_result, _ = score_board(game_state.board)
+    return game_result
@@ -2,15 +2,20 @@ import numpy as np
 from keras.models import Sequential
 from keras.layers import Dense
 
+from dlgo.encoder.labels import one_hot_batches, to_index_labels
+
 
 np.random.seed(42)
 X = np.load('../generated_games/features-40k.npy')
-Y = np.load('../generated_games/labels-40k.npy')
-num_samples = X.shape[0]
+Y = to_index_labels(np.load('../generated_games/labels-40k.npy'))
 board_size = 9*9
+batch_size = 64
+
+# the model has no pass output
+X, Y = X[Y < board_size], Y[Y < board_size]
+num_samples = X.shape[0]
 
 X = X.reshape(num_samples, board_size)
-Y = Y.reshape(num_samples, board_size)
 
 train_samples = int(0.9 * num_samples)
 X_train, X_test = X[:train_samples], X[train_samples:]
@@ -43,15 +48,21 @@ model.compile(
     optimizer='sgd',
     metrics=['accuracy']
 )
+train_steps = int(np.ceil(len(Y_train) / float(batch_size)))
+test_steps = int(np.ceil(len(Y_test) / float(batch_size)))
 model.fit(
-    X_train,
-    Y_train,
-    batch_size=64,
+    one_hot_batches(X_train, Y_train, board_size, batch_size),
+    steps_per_epoch=train_steps,
     epochs=15,
     verbose=1,
-    validation_data=(X_test, Y_test)
+    validation_data=one_hot_batches(X_test, Y_test, board_size, batch_size, shuffle=False),
+    validation_steps=test_steps
+)
+score = model.evaluate(
+    one_hot_batches(X_test, Y_test, board_size, batch_size, shuffle=False),
+    steps=test_steps,
+    verbose=0
 )
-score = model.evaluate(X_test, Y_test, verbose=0)
 print('Test loss: ', score[0])
 print('Test accuracy: ', score[1])
 
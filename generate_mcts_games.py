@@ -3,22 +3,23 @@ import numpy as np
 
 import dlgo.gamestate
 from dlgo.encoder import get_encoder_by_name
+from dlgo.encoder.labels import LABEL_DTYPE, encode_move_label
 from dlgo import board as board
 from dlgo import mcts
 from dlgo.utils import print_board, print_move
 
 
-def generate_game(board_size, rounds, max_moves, temperature):
-    board_list, move_list = [], []
+def generate_game(board_size, rounds, max_moves, temperature, max_nodes, label_format='index'):
+    state_list, move_list = [], []
     encoder = get_encoder_by_name('oneplane', board_size)
     game = dlgo.gamestate.GameState.new_game(board_size)
-    bot = mcts.MCTSAgent(rounds, temperature)
+    bot = mcts.MCTSAgent(rounds, temperature, reuse_tree=True, max_nodes=max_nodes)
     num_moves = 0
 
     while not game.is_over():
         print_board(game.board)
 
-        move = _input(game, encoder, bot, board_list, move_list)
+        move = _input(game, encoder, bot, state_list, move_list, label_format)
 
         print_move(game.next_player, move)
 
@@ -27,7 +28,11 @@ def generate_game(board_size, rounds, max_moves, temperature):
         if num_moves > max_moves:
             break
 
-    return np.array(board_list), np.array(move_list)
+    if label_format == 'index':
+        move_array = np.array(move_list, dtype=LABEL_DTYPE)
+    else:
+        move_array = np.array(move_list).reshape(-1, encoder.num_points())
+    return encoder.encode_batch(state_list), move_array
 
 
 def _update(game, move, num_moves):
@@ -36,10 +41,14 @@ def _update(game, move, num_moves):
     return game, num_moves
 
 
-def _input(game, encoder, bot, board_list, move_list):
+def _input(game, encoder, bot, state_list, move_list, label_format):
     move = bot.select_move(game)
-    if move.is_play:
-        board_list.append(game.board)
+    if label_format == 'index':
+        if not move.is_resign:
+            state_list.append(game)
+            move_list.append(encode_move_label(encoder, move))
+    elif move.is_play:
+        state_list.append(game)
 
         one_hot_move = np.zeros(encoder.num_points())
         one_hot_move[encoder.encode_point(move.point)] = 1
@@ -54,7 +63,8 @@ def main():
 
     for i in range(args.num_games):
         print('Generating game %d/%d...' % (i + 1, args.num_games))
-        x, y = generate_game(args.board_size, args.rounds, args.max_moves, args.temperature)
+        x, y = generate_game(args.board_size, args.rounds, args.max_moves, args.temperature, args.max_nodes,
+                             args.label_format)
         x_list.append(x)
         y_list.append(y)
 
@@ -72,6 +82,10 @@ def _parse_argument():
     parser.add_argument('--temperature', '-t', type=float, default=0.8)
     parser.add_argument('--max-moves', '-m', type=int, default=60, help='Max moves per game.')
     parser.add_argument('--num-games', '-n', type=int, default=10)
+    parser.add_argument('--max-nodes', type=int, default=100000, help='Node budget of the search tree kept between moves.')
+    parser.add_argument('--label-format', choices=['index', 'one-hot'], default='index',
+                        help='int16 move indices with passes as board size squared, '
+                             'or float64 one-hot vectors of the moves that are not passes.')
     parser.add_argument('--board-out')
     parser.add_argument('--move-out')
     args = parser.parse_args()